@@ -4,11 +4,13 @@ import pandas as pd
 import argparse
 import sys
 from datetime import datetime
-import sys
 import os
 
-# Add parent directory to path to import from root
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Add parent directory to path to import from root (once, even when main.py
+# imports this module in-process)
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _ROOT not in sys.path:
+    sys.path.append(_ROOT)
 from shopify_export_cred import db_name
 
 # --- Configuration ---
@@ -264,24 +266,26 @@ def generate_sync_report(comparison_df):
     
     print("\nRun this script with --export option to generate a CSV file for detailed analysis.")
 
-if __name__ == "__main__":
-    # --- Argument Parsing ---
-    parser = argparse.ArgumentParser(description='Compare orders between Shopify and Odoo.')
-    parser.add_argument('--export', action='store_true',
-                        help='Export comparison results to a CSV file')
-    parser.add_argument('--output', type=str, default='order_comparison.csv',
-                        help='Output CSV file name (default: order_comparison.csv)')
-    args = parser.parse_args()
-    
+def main(export=False, output='order_comparison.csv'):
+    """
+    Compares Shopify and Odoo orders and saves the results to the database.
+
+    Args:
+        export: Also export the comparison results to a CSV file
+        output: Output CSV file name
+
+    Returns:
+        0 if successful, 1 otherwise
+    """
     # --- Connect to Database ---
     conn = connect_to_db()
     if not conn:
-        sys.exit(1)
+        return 1
     
     # --- Check Tables ---
     if not check_tables_exist(conn):
         conn.close()
-        sys.exit(1)
+        return 1
     
     # --- Load Orders ---
     shopify_df = load_shopify_orders(conn)
@@ -290,7 +294,7 @@ if __name__ == "__main__":
     if shopify_df.empty or odoo_df.empty:
         print("Failed to load order data. Aborting.")
         conn.close()
-        sys.exit(1)
+        return 1
     
     # --- Compare Orders ---
     comparison_df = compare_orders(shopify_df, odoo_df)
@@ -302,10 +306,22 @@ if __name__ == "__main__":
     generate_sync_report(comparison_df)
     
     # --- Export to CSV if requested ---
-    if args.export:
-        export_to_csv(comparison_df, args.output)
+    if export:
+        export_to_csv(comparison_df, output)
     
     # --- Close Connection ---
     conn.close()
     print("Database connection closed.")
-    print("Comparison process completed.")
\ No newline at end of file
+    print("Comparison process completed.")
+
+    return 0
+
+if __name__ == "__main__":
+    # --- Argument Parsing ---
+    parser = argparse.ArgumentParser(description='Compare orders between Shopify and Odoo.')
+    parser.add_argument('--export', action='store_true',
+                        help='Export comparison results to a CSV file')
+    parser.add_argument('--output', type=str, default='order_comparison.csv',
+                        help='Output CSV file name (default: order_comparison.csv)')
+    args = parser.parse_args()
+    sys.exit(main(export=args.export, output=args.output))
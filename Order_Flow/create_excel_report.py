@@ -5,33 +5,50 @@
 create_excel_report.py - Generate Excel report from order data
 
 This script generates an Excel report from the order data stored in the SQLite database.
-It creates intermediate tables for analysis and exports the final report to an Excel file.
+It builds the excel_report table in a single query and exports it to an Excel file.
 The report is then uploaded to Odoo using the upload_to_odoo.py wrapper.
 """
 
+import csv
+import functools
 import os
+import platform
+import queue
 import sqlite3
-import pandas as pd
+import subprocess
+import threading
 import sys
-from datetime import datetime
-import sys
-import os
-
-# Add parent directory to path to import from root
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from shopify_export_cred import db_name
+import zipfile
+from contextlib import contextmanager
+import xlsxwriter
+import xlsxwriter.workbook
 
 # --- Path Configuration ---
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
 OUTPUT_DIR = os.path.join(SCRIPT_DIR, 'output')
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# Add parent directory to path to import from root; guarded so repeated
+# imports from main.py don't keep growing sys.path
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from shopify_export_cred import db_name
+
 # --- Configuration ---
 # Use parent directory (root) for database location
-ROOT_DIR = os.path.dirname(SCRIPT_DIR)
 DB_FILE = os.path.join(ROOT_DIR, db_name)
 EXCEL_OUTPUT = os.path.join(OUTPUT_DIR, 'order_flow.xlsx')
+CSV_OUTPUT = os.path.join(OUTPUT_DIR, 'order_flow.csv')
 PACKAGE_NAME = 'OrderFlow'
+FETCH_BATCH_SIZE = 10000  # Rows pulled from SQLite per fetchmany() call
+PREFETCH_BATCHES = 4  # Batches the reader thread may queue ahead of the writer
+# The report is opened right away, not archived, so favour save speed over
+# a slightly smaller file (zlib's default level is 6)
+ZIP_COMPRESSLEVEL = 1
+
+# Command used to open the finished report (None means os.startfile on Windows)
+_OPEN_CMD = {'Windows': None, 'Darwin': ['open']}.get(platform.system(), ['xdg-open'])
 
 def connect_to_db():
     """
@@ -41,7 +58,17 @@ def connect_to_db():
         Connection object if successful, None otherwise
     """
     try:
-        conn = sqlite3.connect(DB_FILE)
+        # export_to_excel reads on a helper thread while this thread writes
+        # the workbook; the two never use the connection at the same time
+        conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+        # Plain tuple rows feed write_row()/writerows() directly
+        conn.row_factory = None
+        # Tune for this write-heavy run that rebuilds throwaway report tables
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-262144")
+        conn.execute("PRAGMA mmap_size=268435456")
         print(f"Connected to database: {DB_FILE}")
         return conn
     except sqlite3.Error as e:
@@ -50,7 +77,8 @@ def connect_to_db():
 
 def execute_sql(conn, sql, description=None):
     """
-    Executes a SQL statement.
+    Executes a SQL statement. Committing is left to the caller so several
+    statements can share one transaction.
     
     Args:
         conn: Database connection
@@ -66,7 +94,6 @@ def execute_sql(conn, sql, description=None):
     try:
         cursor = conn.cursor()
         cursor.execute(sql)
-        conn.commit()
         if description:
             print(f"{description} completed successfully.")
         return True
@@ -75,9 +102,9 @@ def execute_sql(conn, sql, description=None):
         print(f"Failed SQL: {sql}")
         return False
 
-def create_shopify_orders_basesku(conn):
+def create_excel_report(conn):
     """
-    Creates the shopify_orders_basesku table.
+    Creates the excel_report table if needed and refills it.
     
     Args:
         conn: Database connection
@@ -85,104 +112,249 @@ def create_shopify_orders_basesku(conn):
     Returns:
         True if successful, False otherwise
     """
-    # Drop table if it exists
+    # shopify_orders_basesku is now an inlined CTE; drop the copy that older
+    # versions of this script left on disk
     drop_sql = "DROP TABLE IF EXISTS shopify_orders_basesku"
-    if not execute_sql(conn, drop_sql, "Dropping shopify_orders_basesku table if it exists"):
+    if not execute_sql(conn, drop_sql):
         return False
     
-    # Create table
-    create_sql = """
-    CREATE TABLE shopify_orders_basesku AS 
-    SELECT Name,
-           A."Lineitem sku" AS SKU,
-           Email,
-           "Financial Status",
-           "Fulfillment Status",
-           "Paid at",
-           "Lineitem quantity",
-           "Lineitem name",
-           "Lineitem price",
-           "Billing Name",
-           Tags,
-           month_paid,
-           year_paid,
-           day_paid,
-           plantname
-      FROM shopify_orders A
-    """
+    # Index the join keys so the LEFT JOIN below does indexed lookups instead
+    # of relying on SQLite's automatic (and not always chosen) indexes
+    index_sql = [
+        "CREATE INDEX IF NOT EXISTS idx_odoo_orders_join ON odoo_orders(Odoo_Name, Product_Default_Code)",
+        'CREATE INDEX IF NOT EXISTS idx_shopify_orders_join ON shopify_orders(Name, "Lineitem sku")',
+        "ANALYZE",
+    ]
+    for sql in index_sql:
+        if not execute_sql(conn, sql):
+            return False
     
-    return execute_sql(conn, create_sql, "Creating shopify_orders_basesku table")
-
-def create_excel_report(conn):
-    """
-    Creates the excel_report table.
+    # The table and its Name index are created once and kept between runs;
+    # rows are ordered at export time and that ORDER BY walks the index
+    # instead of sorting
+    schema_sql = [
+        """
+        CREATE TABLE IF NOT EXISTS excel_report (
+            Name TEXT,
+            Customer TEXT,
+            SKU TEXT,
+            Item TEXT,
+            "Paid Date" TEXT,
+            Qty INTEGER,
+            Payment TEXT,
+            Shipment TEXT,
+            Delivery_Status TEXT,
+            Tags TEXT
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_excel_report_name ON excel_report(Name DESC)",
+    ]
+    for sql in schema_sql:
+        if not execute_sql(conn, sql):
+            return False
     
-    Args:
-        conn: Database connection
-        
-    Returns:
-        True if successful, False otherwise
-    """
-    # Drop table if it exists
-    drop_sql = "DROP TABLE IF EXISTS excel_report"
-    if not execute_sql(conn, drop_sql, "Dropping excel_report table if it exists"):
+    # Clear last run's rows
+    if not execute_sql(conn, "DELETE FROM excel_report", "Clearing excel_report table"):
         return False
     
-    # Create table
-    create_sql = """
-    CREATE TABLE excel_report AS
-    SELECT Name,
-           A."Billing Name" AS Customer,
-           SKU,
-           A."Lineitem name" AS Item,
-           A."Paid at" AS "Paid Date",
-           "Lineitem quantity" AS Qty,
-           "Financial Status" AS Payment,
-           "Fulfillment Status" AS Shipment,
+    # Fill table
+    insert_sql = """
+    INSERT INTO excel_report (
+        Name, Customer, SKU, Item, "Paid Date", Qty,
+        Payment, Shipment, Delivery_Status, Tags
+    )
+    WITH basesku AS (
+        SELECT Name,
+               "Lineitem sku" AS SKU,
+               "Billing Name",
+               "Lineitem name",
+               "Paid at",
+               "Lineitem quantity",
+               "Financial Status",
+               "Fulfillment Status",
+               Tags
+          FROM shopify_orders
+    )
+    SELECT A.Name,
+           A."Billing Name",
+           A.SKU,
+           A."Lineitem name",
+           A."Paid at",
+           A."Lineitem quantity",
+           A."Financial Status",
+           A."Fulfillment Status",
            B.Delivery_Status,
-           Tags
-      FROM shopify_orders_basesku A
+           A.Tags
+      FROM basesku A
       LEFT OUTER JOIN odoo_orders B
       ON A.Name = B.Odoo_Name
       AND A.SKU = B.Product_Default_Code
-      ORDER BY Name DESC
     """
-    
-    return execute_sql(conn, create_sql, "Creating excel_report table")
+    return execute_sql(conn, insert_sql, "Filling excel_report table")
+
+@contextmanager
+def _fast_deflate(module):
+    """
+    Temporarily makes the ZipFile used by an XLSX writer module deflate at
+    ZIP_COMPRESSLEVEL. Neither xlsxwriter nor openpyxl exposes the level.
+    """
+    original = module.ZipFile
+    module.ZipFile = functools.partial(zipfile.ZipFile, compresslevel=ZIP_COMPRESSLEVEL)
+    try:
+        yield
+    finally:
+        module.ZipFile = original
 
-def export_to_excel(conn):
+class XlsxReportWriter:
     """
-    Exports the excel_report table to an Excel file.
+    Streams report rows into an xlsxwriter workbook in constant_memory mode.
+    """
+
+    def __init__(self, path, headers):
+        self.workbook = xlsxwriter.Workbook(path, {
+            'constant_memory': True,
+            'strings_to_formulas': False,
+            'strings_to_urls': False,
+        })
+        self.worksheet = self.workbook.add_worksheet()
+        # One shared Format object, not one per cell
+        header_format = self.workbook.add_format({'bold': True})
+        self.worksheet.write_row(0, 0, headers, header_format)
+        self.row_count = 0
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.row_count += 1
+            self.worksheet.write_row(self.row_count, 0, row)
+
+    def close(self):
+        with _fast_deflate(xlsxwriter.workbook):
+            self.workbook.close()
+
+class OpenpyxlReportWriter:
+    """
+    Streams report rows into an openpyxl write-only workbook.
+    """
+
+    def __init__(self, path, headers):
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font, NamedStyle
+        self.path = path
+        self.workbook = Workbook(write_only=True)
+        self.worksheet = self.workbook.create_sheet('Sheet1')
+        # Register the style once and attach it by name, so the workbook's
+        # style table grows with the number of styles, not cells
+        self.workbook.add_named_style(NamedStyle(name='header', font=Font(bold=True)))
+        header_cells = []
+        for header in headers:
+            cell = WriteOnlyCell(self.worksheet, value=header)
+            cell.style = 'header'
+            header_cells.append(cell)
+        self.worksheet.append(header_cells)
+        self.row_count = 0
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.worksheet.append(row)
+        self.row_count += len(rows)
+
+    def close(self):
+        import openpyxl.writer.excel
+        with _fast_deflate(openpyxl.writer.excel):
+            self.workbook.save(self.path)
+
+def _fetch_batches(cursor, batches, stop):
+    """
+    Reads fetchmany() batches from the cursor onto a queue, ending with None.
+    An exception is passed through the queue for the consumer to re-raise.
+    Stops early once the stop event is set.
+    """
+    try:
+        while not stop.is_set():
+            rows = cursor.fetchmany()
+            if not rows:
+                break
+            batches.put(rows)
+    except Exception as e:
+        batches.put(e)
+    batches.put(None)
+
+def export_to_excel(conn, engine='xlsxwriter'):
+    """
+    Exports the excel_report table to an Excel file, plus a plain CSV copy
+    for consumers that don't need Excel.
     
     Args:
         conn: Database connection
+        engine: 'xlsxwriter' (default) or 'openpyxl' write-only mode
         
     Returns:
         True if successful, False otherwise
     """
     try:
-        # Read the excel_report table into a pandas DataFrame
-        query = "SELECT * FROM excel_report"
-        df = pd.read_sql_query(query, conn)
-        
-        print(f"Retrieved {len(df)} rows from excel_report table.")
-        
-        # Export to Excel without any formatting
-        df.to_excel(EXCEL_OUTPUT, index=False)
+        # Stream rows straight from SQLite into the workbook in fetchmany
+        # batches so peak memory is one batch, not the whole table. Both
+        # writers flush rows to disk as they go, so rows must be written
+        # strictly in order - a single SELECT guarantees that.
+        cursor = conn.cursor()
+        cursor.arraysize = FETCH_BATCH_SIZE
+        query = """
+        SELECT Name, Customer, SKU, Item, "Paid Date", Qty,
+               Payment, Shipment, Delivery_Status, Tags
+          FROM excel_report
+         ORDER BY Name DESC
+        """
+        cursor.execute(query)
+        headers = [d[0] for d in cursor.description]
+
+        # Only the header row is styled; data cells are written unformatted
+        writer_class = OpenpyxlReportWriter if engine == 'openpyxl' else XlsxReportWriter
+        writer = writer_class(EXCEL_OUTPUT, headers)
+        with open(CSV_OUTPUT, 'w', newline='', encoding='utf-8') as csv_file:
+            csv_writer = csv.writer(csv_file)
+            csv_writer.writerow(headers)
+
+            # Decode SQLite rows on a reader thread while this thread builds
+            # the XLSX, so the two CPU-heavy phases overlap
+            batches = queue.Queue(maxsize=PREFETCH_BATCHES)
+            stop = threading.Event()
+            reader = threading.Thread(target=_fetch_batches, args=(cursor, batches, stop), daemon=True)
+            reader.start()
+            try:
+                while True:
+                    rows = batches.get()
+                    if rows is None:
+                        break
+                    if isinstance(rows, Exception):
+                        raise rows
+                    writer.write_rows(rows)
+                    csv_writer.writerows(rows)
+            finally:
+                # If writing failed the reader may be blocked on a full queue;
+                # stop it and drain until it exits, so it never outlives the
+                # cursor (this also runs inside the orchestrator's process)
+                stop.set()
+                while reader.is_alive():
+                    try:
+                        batches.get(timeout=0.1)
+                    except queue.Empty:
+                        pass
+                reader.join()
+        writer.close()
+        row_count = writer.row_count
 
+        print(f"Retrieved {row_count} rows from excel_report table.")
         print(f"Excel report exported to {EXCEL_OUTPUT}")
+        print(f"CSV copy exported to {CSV_OUTPUT}")
 
         # Automatically open the Excel file in the user's default application
         try:
-            import platform
-            if platform.system() == 'Windows':
+            if _OPEN_CMD is None:
                 os.startfile(EXCEL_OUTPUT)
-            elif platform.system() == 'Darwin':  # macOS
-                import subprocess
-                subprocess.run(['open', EXCEL_OUTPUT])
-            else:  # Linux
-                import subprocess
-                subprocess.run(['xdg-open', EXCEL_OUTPUT])
+            else:
+                # Popen so the script does not wait on the viewer
+                subprocess.Popen(_OPEN_CMD + [EXCEL_OUTPUT])
             print(f"Opening Excel file: {EXCEL_OUTPUT}")
         except Exception as open_error:
             print(f"Note: Could not automatically open file (you can open it manually): {open_error}")
@@ -198,6 +370,9 @@ def export_to_excel(conn):
 def main():
     """
     Main function to run the report generation process.
+
+    Returns:
+        0 if successful, 1 otherwise
     """
     print("Starting order flow report generation process...")
     
@@ -205,30 +380,32 @@ def main():
     conn = connect_to_db()
     if not conn:
         print("Failed to connect to the database. Aborting.")
-        sys.exit(1)
+        return 1
     
     try:
-        # Create shopify_orders_basesku table
-        if not create_shopify_orders_basesku(conn):
-            print("Failed to create shopify_orders_basesku table. Aborting.")
-            sys.exit(1)
-        
-        # Create excel_report table
-        if not create_excel_report(conn):
+        # Create excel_report table in a single transaction so the whole
+        # rebuild pays for one commit
+        with conn:
+            conn.execute("BEGIN")
+            report_created = create_excel_report(conn)
+            if not report_created:
+                conn.rollback()
+        if not report_created:
             print("Failed to create excel_report table. Aborting.")
-            sys.exit(1)
+            return 1
         
         # Export to Excel
         if not export_to_excel(conn):
             print("Failed to export to Excel. Aborting.")
-            sys.exit(1)
+            return 1
         
         print(f"Order flow report generation completed successfully.")
         print(f"Excel report saved to: {EXCEL_OUTPUT}")
+        return 0
     
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
-        sys.exit(1)
+        return 1
     
     finally:
         # Close the database connection
@@ -237,4 +414,4 @@ def main():
             print("Database connection closed.")
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
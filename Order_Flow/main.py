@@ -6,19 +6,23 @@ main.py - Main entry point for the Order Flow process
 
 This script orchestrates the entire order synchronization and reporting process:
 1. Updates Shopify orders in the database
-2. Refreshes Odoo orders in the database
+2. Refreshes Odoo orders in the database (concurrently with step 1)
 3. Generates an Excel report comparing the orders
 4. Uploads the report to Odoo via API
 
-The script uses subprocess to run each component and handles errors appropriately.
+Each component is imported and its main() called in this process; pass
+--subprocess to run each one in its own Python interpreter instead.
 """
 
+import importlib
 import subprocess
 import sys
 import os
 import logging
+import threading
 from datetime import datetime
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 
 # --- Path Configuration ---
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -70,23 +74,130 @@ def run_script(script_name, days=None, all_flag=False):
         logger.info(f"Running {script_name}...")
 
     try:
-        # Run without capturing output to see real-time progress
-        result = subprocess.run(
+        # Pipe the child's output through the logger so every line is
+        # timestamped and tagged with its step, which keeps the output of
+        # concurrently running steps readable
+        process = subprocess.Popen(
             command,
-            check=True,
-            text=True
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            errors='replace',
+            bufsize=1,
+            env={**os.environ, 'PYTHONUNBUFFERED': '1'}
         )
+        try:
+            for line in process.stdout:
+                logger.info(f"[{script_name}] {line.rstrip()}")
+            return_code = process.wait()
+        except KeyboardInterrupt:
+            process.kill()
+            process.wait()
+            raise
+        
+        if return_code != 0:
+            logger.error(f"Error running {script_name}: exited with status {return_code}")
+            return False
         
         logger.info(f"{script_name} completed successfully")
         return True
     
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Error running {script_name}: {e}")
+    except Exception as e:
+        logger.error(f"Unexpected error running {script_name}: {e}")
         return False
+
+class StepOutput:
+    """
+    Stand-in for sys.stdout while steps run in this process. Lines printed by
+    a thread that is running a step go to the logger, timestamped and tagged
+    with the step's script name as run_script does for subprocesses, so the
+    output of concurrently running steps stays readable. Output from any
+    other thread passes straight through.
+    """
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+
+    def start(self, script_name):
+        self._local.script_name = script_name
+        self._local.pending = ''
+
+    def stop(self):
+        if self._local.pending:
+            self._log(self._local.pending)
+        self._local.script_name = None
+
+    def _log(self, line):
+        logger.info(f"[{self._local.script_name}] {line.rstrip()}")
+
+    def write(self, text):
+        if getattr(self._local, 'script_name', None) is None:
+            return self._stream.write(text)
+        *lines, self._local.pending = (self._local.pending + text).split('\n')
+        for line in lines:
+            self._log(line)
+        return len(text)
+
+    def flush(self):
+        if getattr(self._local, 'script_name', None) is None:
+            self._stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+_step_output_lock = threading.Lock()
+
+def step_output():
+    """Install StepOutput as sys.stdout (once) and return it."""
+    with _step_output_lock:
+        if not isinstance(sys.stdout, StepOutput):
+            sys.stdout = StepOutput(sys.stdout)
+        return sys.stdout
+
+def run_stage(script_name, days=None, all_flag=False):
+    """
+    Runs a component in this process by importing it and calling its main().
     
+    Args:
+        script_name: Name of the component script (e.g. "create_excel_report.py")
+        days: Number of days of orders to fetch
+        all_flag: Boolean to fetch all orders
+        
+    Returns:
+        True if successful, False otherwise
+    """
+    module_name = os.path.splitext(script_name)[0]
+    
+    # Only pass date arguments to the steps that were given them
+    kwargs = {}
+    if all_flag:
+        kwargs['all_flag'] = True
+        logger.info(f"Running {script_name} with --all flag...")
+    elif days is not None:
+        kwargs['days'] = days
+        logger.info(f"Running {script_name} for the last {days} days...")
+    else:
+        logger.info(f"Running {script_name}...")
+    
+    output = step_output()
+    output.start(script_name)
+    try:
+        module = importlib.import_module(module_name)
+        exit_code = module.main(**kwargs)
+    except SystemExit as e:
+        exit_code = e.code
     except Exception as e:
         logger.error(f"Unexpected error running {script_name}: {e}")
         return False
+    finally:
+        output.stop()
+    
+    if exit_code:
+        logger.error(f"Error running {script_name}: exited with status {exit_code}")
+        return False
+    
+    logger.info(f"{script_name} completed successfully")
+    return True
 
 def check_file_lock(file_path):
     """
@@ -114,18 +225,16 @@ def check_file_lock(file_path):
                 except IOError:
                     return True
             else:
-                # On Linux/Unix, check for .~lock files (LibreOffice) or temp files (Excel)
-                dir_path = os.path.dirname(file_path)
-                filename = os.path.basename(file_path)
-
-                # Check for LibreOffice lock file
-                lock_file = os.path.join(dir_path, f".~lock.{filename}#")
-                if os.path.exists(lock_file):
-                    return True
-
-                # Check for Excel temp file (starts with ~$)
-                excel_temp = os.path.join(dir_path, f"~${filename}")
-                if os.path.exists(excel_temp):
+                # On Linux/Unix, probe for an exclusive lock without blocking.
+                # flock covers BSD-style locks; lockf covers the POSIX record
+                # locks LibreOffice takes on open documents.
+                import fcntl
+                try:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                    fcntl.lockf(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    fcntl.lockf(f.fileno(), fcntl.LOCK_UN)
+                except OSError:
                     return True
 
             return False
@@ -144,7 +253,10 @@ def main():
                         help='Number of days of orders to fetch (default: 90)')
     parser.add_argument('--all', action='store_true',
                         help='Fetch all orders, overriding --days')
+    parser.add_argument('--subprocess', action='store_true',
+                        help='Run each step in its own Python process')
     args = parser.parse_args()
+    run_step = run_script if args.subprocess else run_stage
 
     # --- Check if Excel file is locked ---
     excel_file = os.path.join(OUTPUT_DIR, "order_flow.xlsx")
@@ -155,8 +267,11 @@ def main():
         print(f"\nFile: {excel_file}")
         print("\nPlease close the Excel file before running this script.")
         print("The script cannot write to the file while it is open in Excel.")
-        print("\nPress Enter to exit...")
-        input()
+        logger.error(f"Excel file is open: {excel_file}")
+        # Only pause for a person at a terminal; cron/CI runs exit right away
+        if sys.stdin.isatty():
+            print("\nPress Enter to exit...")
+            input()
         sys.exit(1)
 
     logger.info("=" * 80)
@@ -165,23 +280,30 @@ def main():
     logger.info("=" * 80)
     
     try:
-        # Step 1: Update Shopify orders
-        if not run_script("update_shopify_orders.py", days=args.days, all_flag=args.all):
+        # Steps 1 and 2: Update Shopify orders and refresh Odoo orders.
+        # They call independent APIs and write different tables, so run them
+        # side by side to overlap their network time.
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            shopify_future = executor.submit(run_step, "update_shopify_orders.py", days=args.days, all_flag=args.all)
+            odoo_future = executor.submit(run_step, "refresh_odoo_orders.py", days=args.days, all_flag=args.all)
+            shopify_ok = shopify_future.result()
+            odoo_ok = odoo_future.result()
+        
+        if not shopify_ok:
             logger.error("Failed to update Shopify orders. Aborting.")
             sys.exit(1)
         
-        # Step 2: Refresh Odoo orders
-        if not run_script("refresh_odoo_orders.py", days=args.days, all_flag=args.all):
+        if not odoo_ok:
             logger.error("Failed to refresh Odoo orders. Aborting.")
             sys.exit(1)
         
         # Step 3: Generate Excel report and upload to Odoo
-        if not run_script("create_excel_report.py"): # This script does not need date arguments
+        if not run_step("create_excel_report.py"): # This script does not need date arguments
             logger.error("Failed to create Excel report. Aborting.")
             sys.exit(1)
         
         # Optional: Compare orders for detailed analysis
-        run_script("compare_orders.py")
+        run_step("compare_orders.py")
         
         end_time = datetime.now()
         duration = end_time - start_time
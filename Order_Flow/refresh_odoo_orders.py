@@ -5,12 +5,14 @@ import pandas as pd
 import sys
 import sqlite3
 from datetime import datetime, timedelta
-import sys
 import os
 import ssl
 
-# Add parent directory to path to import from root
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Add parent directory to path to import from root (once, even when main.py
+# imports this module in-process)
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _ROOT not in sys.path:
+    sys.path.append(_ROOT)
 from odoosys import url, db, username, password
 from shopify_export_cred import db_name
 
@@ -23,6 +25,8 @@ ODOO_PASSWORD = password
 ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DB_FILE = os.path.join(ROOT_DIR, db_name)  # Use full path to database in root directory
 TABLE_NAME = 'odoo_orders'
+SQLITE_TIMEOUT = 120 # Seconds to wait for a concurrent writer to release the database
+INSERT_BATCH_SIZE = 10000 # Rows per executemany() batch when loading the table
 
 # Define expected columns for the odoo_orders table
 EXPECTED_COLUMNS = [
@@ -421,14 +425,25 @@ def flatten_order_data(orders, column_list, models_proxy, uid):
 
 # --- Main Execution ---
 
-if __name__ == "__main__":
+def main(days=None, all_flag=False):
+    """
+    Fetches recent Odoo sale orders and replaces the odoo_orders table.
+
+    Args:
+        days: Accepted for a uniform interface with the other Order Flow
+            steps; the Odoo refresh always covers the past 90 days
+        all_flag: Accepted for the same reason; ignored
+
+    Returns:
+        0 if successful, 1 otherwise
+    """
     # --- Connect to Odoo ---
     print(f"[{datetime.now().strftime('%H:%M:%S')}] Connecting to Odoo server...")
     odoo_connection = connect_to_odoo()
     
     if not odoo_connection:
         print("Failed to connect to Odoo server. Aborting.")
-        sys.exit(1)
+        return 1
     
     common_proxy, models_proxy, uid = odoo_connection
     
@@ -438,11 +453,11 @@ if __name__ == "__main__":
     
     if fetched_orders is None:
         print("Failed to fetch orders from Odoo. Aborting.")
-        sys.exit(1)
+        return 1
     
     if not fetched_orders:
         print("No new orders found.")
-        sys.exit(0)
+        return 0
     
     # --- Flatten Data ---
     print(f"[{datetime.now().strftime('%H:%M:%S')}] Flattening fetched order data...")
@@ -450,7 +465,7 @@ if __name__ == "__main__":
     
     if not flattened_orders:
         print("Failed to format fetched orders. Aborting.")
-        sys.exit(1)
+        return 1
     
     # --- Create DataFrame ---
     print(f"[{datetime.now().strftime('%H:%M:%S')}] Creating DataFrame...")
@@ -464,7 +479,9 @@ if __name__ == "__main__":
     print(f"[{datetime.now().strftime('%H:%M:%S')}] Connecting to database: {DB_FILE}")
     conn = None
     try:
-        conn = sqlite3.connect(DB_FILE)
+        # main.py runs the Shopify and Odoo syncs concurrently; wait for the
+        # other writer instead of failing with "database is locked"
+        conn = sqlite3.connect(DB_FILE, timeout=SQLITE_TIMEOUT)
         cursor = conn.cursor()
         
         # Check if table exists
@@ -497,35 +514,28 @@ if __name__ == "__main__":
         conn.commit()
         print(f"Table {TABLE_NAME} created successfully.")
         
-        # Create temp table with identical schema for bulk insert
-        temp_table = f"temp_{TABLE_NAME}"
-        orders_df.to_sql(temp_table, conn, if_exists='replace', index=False)
-        
-        # Insert all records from temp table to main table
+        # Append straight into the table in executemany batches; to_sql
+        # commits once after the last batch
         print(f"Inserting {len(orders_df)} records into {TABLE_NAME}...")
-        cols = ', '.join(f'"{col}"' for col in orders_df.columns)
-        cursor.execute(f"""
-            INSERT INTO {TABLE_NAME} ({cols})
-            SELECT {cols} FROM {temp_table}
-        """)
-        conn.commit()
-        inserted = cursor.rowcount
-
-        # Cleanup and report
-        cursor.execute(f"DROP TABLE IF EXISTS {temp_table}")
-        print(f"Inserted {inserted} new records")
+        orders_df.to_sql(TABLE_NAME, conn, if_exists='append', index=False, chunksize=INSERT_BATCH_SIZE)
+        print(f"Inserted {len(orders_df)} new records")
         print(f"Successfully wrote data to table '{TABLE_NAME}' in {DB_FILE}.")
     
     except sqlite3.Error as e:
         print(f"SQLite error: {e}")
-        sys.exit(1)
+        return 1
     except Exception as e:
         print(f"An error occurred during database operation: {e}")
-        sys.exit(1)
+        return 1
     finally:
         if conn:
             conn.close()
             print(f"[{datetime.now().strftime('%H:%M:%S')}] Database connection closed.")
     
     print(f"[{datetime.now().strftime('%H:%M:%S')}] Order loading process finished. Table has been completely replaced with orders from Odoo.")
-    print(f"[{datetime.now().strftime('%H:%M:%S')}] Script ending...")
\ No newline at end of file
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] Script ending...")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,11 +5,13 @@ import sys
 import argparse
 import sqlite3 # Added for SQLite database interaction
 from datetime import datetime, timedelta
-import sys
 import os
 
-# Add parent directory to path to import from root
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Add parent directory to path to import from root (once, even when main.py
+# imports this module in-process)
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _ROOT not in sys.path:
+    sys.path.append(_ROOT)
 from shopify_export_cred import clean_shop_url, access_token, db_name
 
 # --- Configuration ---
@@ -22,6 +24,8 @@ LIMIT = 250 # Max records per API page
 ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DB_FILE = os.path.join(ROOT_DIR, db_name) # SQLite database file in root directory
 TABLE_NAME = 'shopify_orders' # Table name in the database
+SQLITE_TIMEOUT = 120 # Seconds to wait for a concurrent writer to release the database
+INSERT_BATCH_SIZE = 10000 # Rows per executemany() batch when loading the table
 
 # Define expected columns based on the original orders_export_1.csv header
 # (Keep this consistent for data structure)
@@ -275,23 +279,25 @@ def get_max_created_at_from_db(db_file, table_name):
 
 # --- Main Execution ---
 
-if __name__ == "__main__":
-    # --- Argument Parsing ---
-    parser = argparse.ArgumentParser(description='Fetch Shopify orders, filter them, and store in SQLite.')
-    parser.add_argument('--days', type=int, default=90,
-                        help='Number of days of orders to fetch (default: 90)')
-    parser.add_argument('--all', action='store_true',
-                        help='Fetch all orders, overriding --days')
-    args = parser.parse_args()
+def main(days=90, all_flag=False):
+    """
+    Fetches Shopify orders, filters them, and stores them in SQLite.
 
+    Args:
+        days: Number of days of orders to fetch
+        all_flag: Fetch all orders, overriding days
+
+    Returns:
+        0 if successful, 1 otherwise
+    """
     # Determine the start date for fetching orders
-    if args.all:
+    if all_flag:
         created_at_min_to_fetch = None
         print("Fetching ALL orders (--all flag used)")
     else:
-        start_date = datetime.now() - timedelta(days=args.days)
+        start_date = datetime.now() - timedelta(days=days)
         created_at_min_to_fetch = start_date.strftime('%Y-%m-%dT%H:%M:%S%z')
-        print(f"Fetching orders from the past {args.days} days (since {created_at_min_to_fetch})")
+        print(f"Fetching orders from the past {days} days (since {created_at_min_to_fetch})")
 
 
     # --- Fetch Orders ---
@@ -300,11 +306,11 @@ if __name__ == "__main__":
 
     if fetched_orders_raw is None:
         print("Failed to fetch orders from Shopify. Aborting.")
-        sys.exit(1)
+        return 1
 
     if not fetched_orders_raw:
         print("No new orders found.")
-        sys.exit(0)
+        return 0
 
     # --- Flatten Data ---
     print("Flattening fetched order data...")
@@ -312,7 +318,7 @@ if __name__ == "__main__":
 
     if not flattened_orders:
         print("Failed to format fetched orders. Aborting.")
-        sys.exit(1)
+        return 1
 
     # --- Create DataFrame ---
     orders_df = pd.DataFrame(flattened_orders)
@@ -368,13 +374,15 @@ if __name__ == "__main__":
 
     if filtered_df.empty:
         print("No orders matched the filter criteria (paid and fulfilled). Nothing to load into the database.")
-        sys.exit(0)
+        return 0
 
     # --- Load to SQLite ---
     print(f"Connecting to database: {DB_FILE}")
     conn = None # Initialize conn to None
     try:
-        conn = sqlite3.connect(DB_FILE)
+        # main.py runs the Shopify and Odoo syncs concurrently; wait for the
+        # other writer instead of failing with "database is locked"
+        conn = sqlite3.connect(DB_FILE, timeout=SQLITE_TIMEOUT)
         cursor = conn.cursor()
         
         # Check if table exists
@@ -411,34 +419,34 @@ if __name__ == "__main__":
         conn.commit()
         print(f"Table {TABLE_NAME} created successfully.")
         
-        # Create temp table with identical schema for bulk insert
-        temp_table = f"temp_{TABLE_NAME}"
-        new_orders_df.to_sql(temp_table, conn, if_exists='replace', index=False)
-        
-        # Insert all records from temp table to main table
+        # Append straight into the table in executemany batches; to_sql
+        # commits once after the last batch
         print(f"Inserting {len(new_orders_df)} records into {TABLE_NAME}...")
-        cols = ', '.join(f'"{col}"' for col in new_orders_df.columns)
-        cursor.execute(f"""
-            INSERT INTO {TABLE_NAME} ({cols})
-            SELECT {cols} FROM {temp_table}
-        """)
-        conn.commit()
-        
-        # Cleanup and report
-        cursor.execute(f"DROP TABLE IF EXISTS {temp_table}")
-        inserted = cursor.rowcount
-        print(f"Inserted {inserted} new records")
+        new_orders_df.to_sql(TABLE_NAME, conn, if_exists='append', index=False, chunksize=INSERT_BATCH_SIZE)
+        print(f"Inserted {len(new_orders_df)} new records")
         print(f"Successfully wrote data to table '{TABLE_NAME}' in {DB_FILE}.")
 
     except sqlite3.Error as e:
         print(f"SQLite error: {e}")
-        sys.exit(1)
+        return 1
     except Exception as e:
         print(f"An error occurred during database operation: {e}")
-        sys.exit(1)
+        return 1
     finally:
         if conn:
             conn.close()
             print("Database connection closed.")
 
-    print(f"Order loading process finished. Table has been completely replaced with orders from the past {args.days} days.")
\ No newline at end of file
+    print(f"Order loading process finished. Table has been completely replaced with orders from the past {days} days.")
+
+    return 0
+
+if __name__ == "__main__":
+    # --- Argument Parsing ---
+    parser = argparse.ArgumentParser(description='Fetch Shopify orders, filter them, and store in SQLite.')
+    parser.add_argument('--days', type=int, default=90,
+                        help='Number of days of orders to fetch (default: 90)')
+    parser.add_argument('--all', action='store_true',
+                        help='Fetch all orders, overriding --days')
+    args = parser.parse_args()
+    sys.exit(main(days=args.days, all_flag=args.all))
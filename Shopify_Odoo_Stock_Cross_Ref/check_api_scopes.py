@@ -6,6 +6,10 @@ This script queries the Shopify API to determine exactly what scopes (permission
 are granted to your custom app's access token. This helps identify permission
 differences between multiple Shopify stores.
 
+The probes themselves live in shopify_probe.py and are shared with
+check_shopify_credentials.py; this script runs them at the "full" level
+(including bulk operations) and prints a detailed report.
+
 Usage:
     python check_api_scopes.py                    # Check default credentials
     python check_api_scopes.py -f creds.py       # Check alternative credentials
@@ -14,9 +18,8 @@ Usage:
 import sys
 import os
 import argparse
-import importlib.util
-import requests
-import json
+
+from shopify_probe import SCOPE_TESTS, create_session, load_credential_module, run_probes
 
 # Add parent directory to path to import credentials
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -37,9 +40,7 @@ def load_credentials_from_file(credential_file):
         print(f"Error: Credential file not found: {credential_file}")
         sys.exit(1)
 
-    spec = importlib.util.spec_from_file_location("shopify_creds", credential_file)
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
+    module = load_credential_module(credential_file)
 
     return {
         'shop_url': getattr(module, 'clean_shop_url', None),
@@ -53,380 +54,127 @@ def print_section(title):
     print(f"  {title}")
     print("=" * 80)
 
-def check_api_version(shop_url, access_token):
-    """Check what API version is being used."""
+def check_api_version(results):
+    """Report which API version answered the shop query."""
     print_section("API Version Information")
 
-    # Try to get shop info which includes the API version
-    api_version = '2024-04'  # Default
-    url = f"https://{shop_url}/admin/api/{api_version}/shop.json"
-    headers = {
-        "X-Shopify-Access-Token": access_token,
-        "Content-Type": "application/json"
-    }
-
-    response = requests.get(url, headers=headers)
-    if response.status_code == 200:
-        print(f"✓ Using API version: {api_version}")
-        shop_data = response.json().get('shop', {})
-        print(f"  Shop: {shop_data.get('name')}")
-        print(f"  Plan: {shop_data.get('plan_name')}")
-        return api_version
+    if results.connected:
+        print(f"✓ Using API version: {results.api_version}")
+        print(f"  Shop: {results.shop.get('name')}")
+        print(f"  Plan: {(results.shop.get('plan') or {}).get('displayName')}")
     else:
         print(f"✗ Could not determine API version")
-        return api_version
-
-def check_rest_api_scopes(shop_url, access_token, api_version):
-    """Test various REST API endpoints to infer permissions."""
-    print_section("REST API Endpoint Tests")
-
-    headers = {
-        "X-Shopify-Access-Token": access_token,
-        "Content-Type": "application/json"
-    }
-
-    tests = [
-        {
-            'name': 'Products (read_products)',
-            'url': f"https://{shop_url}/admin/api/{api_version}/products.json?limit=1",
-            'scope': 'read_products'
-        },
-        {
-            'name': 'Inventory Levels (read_inventory)',
-            'url': f"https://{shop_url}/admin/api/{api_version}/inventory_levels.json?limit=1",
-            'scope': 'read_inventory'
-        },
-        {
-            'name': 'Locations (read_locations)',
-            'url': f"https://{shop_url}/admin/api/{api_version}/locations.json",
-            'scope': 'read_locations'
-        },
-        {
-            'name': 'Orders (read_orders)',
-            'url': f"https://{shop_url}/admin/api/{api_version}/orders.json?limit=1&status=any",
-            'scope': 'read_orders'
-        }
-    ]
-
-    results = {}
-    for test in tests:
-        response = requests.get(test['url'], headers=headers)
-        if response.status_code == 200:
-            print(f"✓ {test['name']}: GRANTED")
-            results[test['scope']] = True
-        elif response.status_code == 403:
-            print(f"✗ {test['name']}: DENIED (403 Forbidden)")
-            results[test['scope']] = False
+        if results.error:
+            print(f"  {results.error}")
+    return results.api_version
+
+def check_rest_api_scopes(results):
+    """Report the scopes inferred from the combined GraphQL probe."""
+    print_section("API Scope Tests")
+
+    scopes = {}
+    for label, scope in SCOPE_TESTS.values():
+        granted = results.scopes.get(scope)
+        scopes[scope] = granted
+        if granted:
+            print(f"✓ {label}: GRANTED")
+        elif granted is False:
+            print(f"✗ {label}: DENIED (ACCESS_DENIED)")
+        elif results.scope_status not in (None, 200):
+            print(f"? {label}: UNKNOWN (Status {results.scope_status})")
         else:
-            print(f"? {test['name']}: UNKNOWN (Status {response.status_code})")
-            results[test['scope']] = None
+            print(f"? {label}: UNKNOWN")
 
-    return results
+    return scopes
 
-def check_graphql_introspection(shop_url, access_token, api_version):
-    """Use GraphQL introspection to check what queries are available."""
+def check_graphql_introspection(results):
+    """Report whether basic GraphQL queries are accepted."""
     print_section("GraphQL API Introspection")
 
-    url = f"https://{shop_url}/admin/api/{api_version}/graphql.json"
-    headers = {
-        "X-Shopify-Access-Token": access_token,
-        "Content-Type": "application/json"
-    }
-
-    # Simple query to test GraphQL access
-    query = """
-    {
-      shop {
-        name
-        plan {
-          displayName
-        }
-      }
-    }
-    """
-
-    response = requests.post(url, json={'query': query}, headers=headers)
-
-    if response.status_code == 200:
-        data = response.json()
-        if 'errors' in data:
-            print(f"✗ GraphQL API: ERROR")
-            print(f"  Errors: {data['errors']}")
-            return False
+    if results.status_code != 200:
+        if results.status_code is None:
+            print(f"✗ GraphQL API: {results.error}")
         else:
-            print(f"✓ GraphQL API: ACCESSIBLE")
-            shop_data = data.get('data', {}).get('shop', {})
-            if shop_data:
-                print(f"  Shop: {shop_data.get('name')}")
-                plan = shop_data.get('plan', {})
-                if plan:
-                    print(f"  Plan: {plan.get('displayName')}")
-            return True
-    else:
-        print(f"✗ GraphQL API: HTTP {response.status_code}")
+            print(f"✗ GraphQL API: HTTP {results.status_code}")
         return False
 
-def test_bulk_operation_start(shop_url, access_token, api_version):
-    """Test if we can START a bulk operation (doesn't wait for completion)."""
-    print_section("Bulk Operations Test (START only)")
-
-    url = f"https://{shop_url}/admin/api/{api_version}/graphql.json"
-    headers = {
-        "X-Shopify-Access-Token": access_token,
-        "Content-Type": "application/json"
-    }
-
-    # Simplified bulk operation query (just products, no inventory)
-    mutation = """
-    mutation {
-      bulkOperationRunQuery(
-       query: \"\"\"
-        {
-          products(first: 10) {
-            edges {
-              node {
-                id
-                title
-              }
-            }
-          }
-        }
-        \"\"\"
-      ) {
-        bulkOperation {
-          id
-          status
-        }
-        userErrors {
-          field
-          message
-        }
-      }
-    }
-    """
-
-    print("Attempting to start a simple bulk operation...")
-    response = requests.post(url, json={'query': mutation}, headers=headers)
-
-    if response.status_code != 200:
-        print(f"✗ HTTP Error: {response.status_code}")
-        print(f"  Response: {response.text}")
+    if results.graphql_errors:
+        print(f"✗ GraphQL API: ERROR")
+        print(f"  Errors: {results.graphql_errors}")
         return False
 
-    data = response.json()
+    print(f"✓ GraphQL API: ACCESSIBLE")
+    if results.shop:
+        print(f"  Shop: {results.shop.get('name')}")
+        plan = results.shop.get('plan', {})
+        if plan:
+            print(f"  Plan: {plan.get('displayName')}")
+    return True
+
+def _explain_bulk_access_denied():
+    print("\n  This means the bulk operation API requires additional permissions")
+    print("  that are not granted to this access token, even though basic")
+    print("  GraphQL queries work.")
+
+def _explain_inventory_access_denied():
+    print("\n  DIAGNOSIS: The inventory bulk query requires read_inventory scope")
+    print("  but your access token does not have this permission.")
+    print("\n  FIX:")
+    print("  1. Go to Shopify Admin > Settings > Apps and sales channels")
+    print("  2. Select your custom app")
+    print("  3. Go to Configuration > Admin API access scopes")
+    print("  4. Enable: read_inventory")
+    print("  5. Save and reinstall the app")
+
+def report_bulk_probe(probe, label, on_access_denied, error=None):
+    """Print the outcome of one bulk operation probe and return its verdict."""
+    print(f"Operation: {label}")
+
+    if probe is None:
+        print(f"✗ Request failed: {error}")
+        return None
+
+    if probe.http_status != 200:
+        print(f"✗ HTTP Error: {probe.http_status}")
+        print(f"  Response: {probe.body}")
+        return False
 
-    if 'errors' in data:
+    if probe.errors:
         print(f"✗ GraphQL Errors:")
-        for error in data['errors']:
-            print(f"  - {error.get('message')}")
+        for message in probe.errors:
+            print(f"  - {message}")
         return False
 
-    bulk_op = data.get('data', {}).get('bulkOperationRunQuery', {})
-    user_errors = bulk_op.get('userErrors', [])
-
-    if user_errors:
+    if probe.user_errors:
         print(f"✗ User Errors:")
-        for error in user_errors:
+        for error in probe.user_errors:
             print(f"  - {error.get('message')} (field: {error.get('field')})")
         return False
 
-    operation = bulk_op.get('bulkOperation', {})
-    if operation:
-        op_id = operation.get('id')
-        status = operation.get('status')
-        print(f"✓ Bulk operation started successfully!")
-        print(f"  Operation ID: {op_id}")
-        print(f"  Initial Status: {status}")
-
-        # Now poll once to see if it immediately fails
-        print("\nPolling operation status once...")
-        query = """
-        query {
-          node(id: "%s") {
-            ... on BulkOperation {
-              id
-              status
-              errorCode
-              objectCount
-            }
-          }
-        }
-        """ % op_id
-
-        import time
-        time.sleep(2)  # Give it a moment
-
-        poll_response = requests.post(url, json={'query': query}, headers=headers)
-        if poll_response.status_code == 200:
-            poll_data = poll_response.json().get('data', {}).get('node', {})
-            poll_status = poll_data.get('status')
-            error_code = poll_data.get('errorCode')
-
-            print(f"  Current Status: {poll_status}")
-            if error_code:
-                print(f"  ✗ Error Code: {error_code}")
-                if error_code == 'ACCESS_DENIED':
-                    print("\n  This means the bulk operation API requires additional permissions")
-                    print("  that are not granted to this access token, even though basic")
-                    print("  GraphQL queries work.")
-                return False
-            else:
-                print(f"  ✓ No errors detected (operation {poll_status})")
-                return True
-        else:
-            print(f"  ? Could not poll status (HTTP {poll_response.status_code})")
-            return None
-    else:
+    if not probe.op_id:
         print(f"✗ No bulk operation returned in response")
         return False
 
-def test_inventory_bulk_operation(shop_url, access_token, api_version):
-    """Test the specific bulk operation used in the actual script."""
-    print_section("Full Inventory Bulk Operation Test")
-
-    url = f"https://{shop_url}/admin/api/{api_version}/graphql.json"
-    headers = {
-        "X-Shopify-Access-Token": access_token,
-        "Content-Type": "application/json"
-    }
-
-    # This is the ACTUAL query from get_shopify_data_current.py
-    mutation = """
-    mutation {
-      bulkOperationRunQuery(
-       query: \"\"\"
-        {
-          products {
-            edges {
-              node {
-                id
-                title
-                handle
-                status
-                variants {
-                  edges {
-                    node {
-                      id
-                      sku
-                      title
-                      inventoryQuantity
-                      inventoryItem {
-                        id
-                        tracked
-                        inventoryLevels {
-                          edges {
-                            node {
-                              id
-                              quantities(names: ["available", "on_hand", "committed", "incoming"]) {
-                                name
-                                quantity
-                              }
-                              location {
-                                id
-                                name
-                              }
-                            }
-                          }
-                        }
-                      }
-                    }
-                  }
-                }
-              }
-            }
-          }
-        }
-        \"\"\"
-      ) {
-        bulkOperation {
-          id
-          status
-        }
-        userErrors {
-          field
-          message
-        }
-      }
-    }
-    """
+    print(f"✓ Bulk operation started successfully!")
+    print(f"  Operation ID: {probe.op_id}")
+    print(f"  Initial Status: {probe.initial_status}")
 
-    print("Starting the EXACT bulk operation from get_shopify_data_current.py...")
-    response = requests.post(url, json={'query': mutation}, headers=headers)
+    print("\nPolled operation status until it settled")
+    if probe.poll_http_status != 200:
+        print(f"  ? Could not poll status (HTTP {probe.poll_http_status})")
+        return None
 
-    if response.status_code != 200:
-        print(f"✗ HTTP Error: {response.status_code}")
-        print(f"  Response: {response.text}")
+    print(f"  Current Status: {probe.status}")
+    if probe.error_code:
+        print(f"  ✗ Error Code: {probe.error_code}")
+        if probe.error_code == 'ACCESS_DENIED':
+            on_access_denied()
         return False
 
-    data = response.json()
-
-    if 'errors' in data:
-        print(f"✗ GraphQL Errors:")
-        for error in data['errors']:
-            print(f"  - {error.get('message')}")
-        return False
-
-    bulk_op = data.get('data', {}).get('bulkOperationRunQuery', {})
-    user_errors = bulk_op.get('userErrors', [])
-
-    if user_errors:
-        print(f"✗ User Errors:")
-        for error in user_errors:
-            print(f"  - {error.get('message')} (field: {error.get('field')})")
-        return False
-
-    operation = bulk_op.get('bulkOperation', {})
-    if operation:
-        op_id = operation.get('id')
-        status = operation.get('status')
-        print(f"✓ Full inventory bulk operation started!")
-        print(f"  Operation ID: {op_id}")
-        print(f"  Initial Status: {status}")
-
-        # Poll once
-        print("\nPolling operation status...")
-        query = """
-        query {
-          node(id: "%s") {
-            ... on BulkOperation {
-              id
-              status
-              errorCode
-              objectCount
-            }
-          }
-        }
-        """ % op_id
-
-        import time
-        time.sleep(2)
-
-        poll_response = requests.post(url, json={'query': query}, headers=headers)
-        if poll_response.status_code == 200:
-            poll_data = poll_response.json().get('data', {}).get('node', {})
-            poll_status = poll_data.get('status')
-            error_code = poll_data.get('errorCode')
-
-            print(f"  Current Status: {poll_status}")
-            if error_code:
-                print(f"  ✗ Error Code: {error_code}")
-                if error_code == 'ACCESS_DENIED':
-                    print("\n  DIAGNOSIS: The inventory bulk query requires read_inventory scope")
-                    print("  but your access token does not have this permission.")
-                    print("\n  FIX:")
-                    print("  1. Go to Shopify Admin > Settings > Apps and sales channels")
-                    print("  2. Select your custom app")
-                    print("  3. Go to Configuration > Admin API access scopes")
-                    print("  4. Enable: read_inventory")
-                    print("  5. Save and reinstall the app")
-                return False
-            else:
-                print(f"  ✓ No errors! Operation is proceeding ({poll_status})")
-                if poll_status == 'COMPLETED':
-                    print(f"  Objects found: {poll_data.get('objectCount', 'unknown')}")
-                return True
-
-    return None
+    print(f"  ✓ No errors detected (operation {probe.status})")
+    if probe.status == 'COMPLETED':
+        print(f"  Objects found: {probe.object_count or 'unknown'}")
+    return True
 
 def main():
     parser = argparse.ArgumentParser(
@@ -476,14 +224,30 @@ Examples:
     print(f"  Shop: {shop_url}")
     print(f"  Token: {access_token[:15]}...")
 
-    # Run tests
-    api_version = check_api_version(shop_url, access_token)
-    rest_results = check_rest_api_scopes(shop_url, access_token, api_version)
-    graphql_ok = check_graphql_introspection(shop_url, access_token, api_version)
+    # Run every probe once over one pooled connection, then report
+    print("\nRunning probes (this starts two bulk operations)...")
+    session = create_session(access_token)
+    results = run_probes(session, shop_url, level="full")
+
+    check_api_version(results)
+    rest_results = check_rest_api_scopes(results)
+    graphql_ok = check_graphql_introspection(results)
 
     if graphql_ok:
-        bulk_simple = test_bulk_operation_start(shop_url, access_token, api_version)
-        bulk_inventory = test_inventory_bulk_operation(shop_url, access_token, api_version)
+        print_section("Bulk Operations Test (START only)")
+        bulk_simple = report_bulk_probe(
+            results.bulk_simple, "a simple bulk operation",
+            _explain_bulk_access_denied, results.error)
+        if rest_results.get('read_inventory') is False:
+            # The scope probe already answered this; run_probes skipped it
+            print("\nSkipping inventory bulk test (read_inventory denied)")
+            bulk_inventory = False
+        else:
+            print_section("Full Inventory Bulk Operation Test")
+            bulk_inventory = report_bulk_probe(
+                results.bulk_inventory,
+                "the EXACT bulk operation from get_shopify_data_current.py",
+                _explain_inventory_access_denied, results.error)
     else:
         print("\nSkipping bulk operation tests (GraphQL not accessible)")
         bulk_simple = False
@@ -491,7 +255,7 @@ Examples:
 
     # Summary
     print_section("Summary")
-    print("\nREST API Scopes:")
+    print("\nAPI Scopes:")
     for scope, granted in rest_results.items():
         status = "✓ GRANTED" if granted else "✗ DENIED" if granted is False else "? UNKNOWN"
         print(f"  {scope:20s} {status}")
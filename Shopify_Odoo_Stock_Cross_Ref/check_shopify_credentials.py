@@ -4,6 +4,7 @@ Shopify Credentials Checker
 
 This utility tests your Shopify API credentials and permissions.
 It performs several checks to help diagnose connection issues.
+The probes are shared with check_api_scopes.py (see shopify_probe.py).
 
 Usage:
     python check_shopify_credentials.py                        # Use default shopify_export_cred.py
@@ -13,9 +14,9 @@ Usage:
 
 import sys
 import os
-import requests
 import argparse
-import importlib.util
+
+from shopify_probe import create_session, load_credential_module, run_probes
 
 # Add parent directory to path to import credentials
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -41,12 +42,8 @@ def load_credentials_from_file(credential_file):
     if not os.path.exists(credential_file):
         raise FileNotFoundError(f"Credential file not found: {credential_file}")
 
-    # Load the module dynamically
-    spec = importlib.util.spec_from_file_location("shopify_creds", credential_file)
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-
-    return module
+    # Load the module dynamically; reloaded only when the file changes
+    return load_credential_module(credential_file)
 
 def check_credential_file(credential_file=None):
     """Check if the credential file exists and can be imported."""
@@ -90,161 +87,86 @@ def check_credential_file(credential_file=None):
         print("  - db_name = 'your_db.db'")
         return None, None
 
-def test_basic_connection(access_token, shop_url):
+def test_basic_connection(probes):
     """Test basic connection to Shopify API."""
     print_section("Testing Basic API Connection")
 
-    api_version = '2024-04'
-    url = f"https://{shop_url}/admin/api/{api_version}/shop.json"
-    headers = {
-        "X-Shopify-Access-Token": access_token,
-        "Content-Type": "application/json"
-    }
-
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-
-        if response.status_code == 200:
-            shop_data = response.json().get('shop', {})
-            print("✓ Successfully connected to Shopify API")
-            print(f"  Shop Name: {shop_data.get('name', 'Unknown')}")
-            print(f"  Shop Owner: {shop_data.get('shop_owner', 'Unknown')}")
-            print(f"  Email: {shop_data.get('email', 'Unknown')}")
-            print(f"  Domain: {shop_data.get('domain', 'Unknown')}")
-            print(f"  Plan: {shop_data.get('plan_name', 'Unknown')}")
-            return True
-        elif response.status_code == 401:
-            print("✗ ERROR: Authentication failed (401 Unauthorized)")
-            print("  - Your access token may be invalid or expired")
-            print("  - Verify the token in your Shopify admin")
-            return False
-        elif response.status_code == 404:
-            print("✗ ERROR: Shop not found (404)")
-            print(f"  - Check that '{shop_url}' is correct")
-            print("  - It should be: your-store-name.myshopify.com")
-            return False
-        else:
-            print(f"✗ ERROR: Unexpected response ({response.status_code})")
-            print(f"  Response: {response.text[:200]}")
-            return False
-
-    except requests.exceptions.Timeout:
+    if probes.timed_out:
         print("✗ ERROR: Connection timeout")
         print("  - Check your internet connection")
-        print(f"  - Verify '{shop_url}' is accessible")
+        print(f"  - Verify '{probes.shop_url}' is accessible")
         return False
-    except requests.exceptions.RequestException as e:
-        print(f"✗ ERROR: Connection failed: {e}")
+    if probes.error:
+        print(f"✗ ERROR: Connection failed: {probes.error}")
         return False
 
-def test_products_access(access_token, shop_url):
-    """Test if the token has products read access."""
-    print_section("Testing Products Read Access")
-
-    api_version = '2024-04'
-    url = f"https://{shop_url}/admin/api/{api_version}/products.json?limit=1"
-    headers = {
-        "X-Shopify-Access-Token": access_token,
-        "Content-Type": "application/json"
-    }
-
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-
-        if response.status_code == 200:
-            products = response.json().get('products', [])
-            print("✓ Products read access: GRANTED")
-            print(f"  Found {len(products)} product(s) in test query")
-            return True
-        elif response.status_code == 403:
-            print("✗ Products read access: DENIED")
-            print("  - Your access token lacks 'read_products' scope")
-            print("  - Add this scope in your Shopify custom app settings")
-            return False
-        else:
-            print(f"✗ Unexpected response ({response.status_code})")
-            print(f"  Response: {response.text[:200]}")
-            return False
+    if probes.connected:
+        shop_data = probes.shop
+        print("✓ Successfully connected to Shopify API")
+        print(f"  Shop Name: {shop_data.get('name', 'Unknown')}")
+        print(f"  Email: {shop_data.get('email', 'Unknown')}")
+        print(f"  Domain: {(shop_data.get('primaryDomain') or {}).get('host', 'Unknown')}")
+        print(f"  Plan: {(shop_data.get('plan') or {}).get('displayName', 'Unknown')}")
+        return True
+    elif probes.status_code == 401:
+        print("✗ ERROR: Authentication failed (401 Unauthorized)")
+        print("  - Your access token may be invalid or expired")
+        print("  - Verify the token in your Shopify admin")
+        return False
+    elif probes.status_code == 404:
+        print("✗ ERROR: Shop not found (404)")
+        print(f"  - Check that '{probes.shop_url}' is correct")
+        print("  - It should be: your-store-name.myshopify.com")
+        return False
+    else:
+        print(f"✗ ERROR: Unexpected response ({probes.status_code})")
+        print(f"  Response: {probes.body or probes.graphql_errors}")
+        return False
 
-    except requests.exceptions.RequestException as e:
-        print(f"✗ ERROR: {e}")
+def _test_scope(probes, scope, label):
+    """Report one scope from the shared scope probe."""
+    granted = probes.scopes.get(scope)
+    if granted:
+        print(f"✓ {label} read access: GRANTED")
+        return True
+    elif granted is False:
+        print(f"✗ {label} read access: DENIED")
+        print(f"  - Your access token lacks '{scope}' scope")
+        print("  - Add this scope in your Shopify custom app settings")
+        return False
+    else:
+        print(f"✗ Unexpected response ({probes.scope_status or probes.error})")
         return False
 
-def test_inventory_access(access_token, shop_url):
+def test_products_access(probes):
+    """Test if the token has products read access."""
+    print_section("Testing Products Read Access")
+    return _test_scope(probes, 'read_products', "Products")
+
+def test_inventory_access(probes):
     """Test if the token has inventory read access."""
     print_section("Testing Inventory Read Access")
+    return _test_scope(probes, 'read_inventory', "Inventory")
 
-    api_version = '2024-04'
-    url = f"https://{shop_url}/admin/api/{api_version}/inventory_levels.json?limit=1"
-    headers = {
-        "X-Shopify-Access-Token": access_token,
-        "Content-Type": "application/json"
-    }
-
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-
-        if response.status_code == 200:
-            print("✓ Inventory read access: GRANTED")
-            return True
-        elif response.status_code == 403:
-            print("✗ Inventory read access: DENIED")
-            print("  - Your access token lacks 'read_inventory' scope")
-            print("  - Add this scope in your Shopify custom app settings")
-            return False
-        else:
-            print(f"✗ Unexpected response ({response.status_code})")
-            print(f"  Response: {response.text[:200]}")
-            return False
-
-    except requests.exceptions.RequestException as e:
-        print(f"✗ ERROR: {e}")
-        return False
-
-def test_bulk_operations(access_token, shop_url):
+def test_bulk_operations(probes):
     """Test if bulk operations are supported."""
     print_section("Testing Bulk Operations Support")
 
-    api_version = '2024-04'
-    url = f"https://{shop_url}/admin/api/{api_version}/graphql.json"
-    headers = {
-        "X-Shopify-Access-Token": access_token,
-        "Content-Type": "application/json"
-    }
-
-    # Simple test query to check GraphQL access
-    query = """
-    {
-        shop {
-            name
-        }
-    }
-    """
-
-    try:
-        response = requests.post(url, json={'query': query}, headers=headers, timeout=10)
-
-        if response.status_code == 200:
-            data = response.json()
-            if 'errors' in data:
-                print("✗ GraphQL access: ERROR")
-                print(f"  Errors: {data['errors']}")
-                return False
-            else:
-                print("✓ GraphQL API access: GRANTED")
-                print("  Note: Bulk operations may still require specific plan or permissions")
-                return True
-        elif response.status_code == 403:
-            print("✗ GraphQL access: DENIED")
-            print("  - Your access token may not support GraphQL API")
-            return False
-        else:
-            print(f"✗ Unexpected response ({response.status_code})")
-            print(f"  Response: {response.text[:200]}")
-            return False
-
-    except requests.exceptions.RequestException as e:
-        print(f"✗ ERROR: {e}")
+    if probes.graphql_ok:
+        print("✓ GraphQL API access: GRANTED")
+        print("  Note: Bulk operations may still require specific plan or permissions")
+        return True
+    elif probes.graphql_errors:
+        print("✗ GraphQL access: ERROR")
+        print(f"  Errors: {probes.graphql_errors}")
+        return False
+    elif probes.status_code == 403:
+        print("✗ GraphQL access: DENIED")
+        print("  - Your access token may not support GraphQL API")
+        return False
+    else:
+        print(f"✗ Unexpected response ({probes.status_code})")
+        print(f"  Response: {probes.body}")
         return False
 
 def print_summary(results):
@@ -312,21 +234,26 @@ Examples:
         print("\n✗ Cannot proceed without valid credentials")
         return 1
 
+    # Every probe runs once over one pooled session; the tests below
+    # only interpret the answers
+    session = create_session(access_token)
+    probes = run_probes(session, shop_url, level="basic")
+
     # Step 2: Test basic connection
-    results['Basic Connection'] = test_basic_connection(access_token, shop_url)
+    results['Basic Connection'] = test_basic_connection(probes)
     if not results['Basic Connection']:
         print("\n✗ Cannot proceed without basic connection")
         print_summary(results)
         return 1
 
     # Step 3: Test products access
-    results['Products Read Access'] = test_products_access(access_token, shop_url)
+    results['Products Read Access'] = test_products_access(probes)
 
     # Step 4: Test inventory access
-    results['Inventory Read Access'] = test_inventory_access(access_token, shop_url)
+    results['Inventory Read Access'] = test_inventory_access(probes)
 
     # Step 5: Test bulk operations
-    results['GraphQL/Bulk Operations'] = test_bulk_operations(access_token, shop_url)
+    results['GraphQL/Bulk Operations'] = test_bulk_operations(probes)
 
     # Print summary
     print_summary(results)
@@ -9,12 +9,21 @@ the token has, rather than inferring from API calls.
 import sys
 import os
 import argparse
+import hashlib
 import importlib.util
-import requests
+import json
+import time
+
+from shopify_probe import create_session
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Scopes only change when the app is reinstalled (which issues a new token),
+# so a recent answer for the same shop + token can be reused
+SCOPE_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'shopify_scopes')
+SCOPE_CACHE_TTL = 6 * 60 * 60  # seconds
+
 def load_credentials_from_file(credential_file):
     """Dynamically load credentials from a Python file."""
     if not os.path.isabs(credential_file):
@@ -38,20 +47,49 @@ def load_credentials_from_file(credential_file):
         'access_token': getattr(module, 'access_token', None),
     }
 
-def get_access_scopes(shop_url, access_token):
+def _scope_cache_path(shop_url, access_token):
+    key = hashlib.sha1((shop_url + access_token).encode()).hexdigest()
+    return os.path.join(SCOPE_CACHE_DIR, f"{key}.json")
+
+def _read_cached_scopes(cache_path):
+    """Return cached scopes if the cache file is younger than the TTL."""
+    try:
+        if time.time() - os.path.getmtime(cache_path) >= SCOPE_CACHE_TTL:
+            return None
+        with open(cache_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_cached_scopes(cache_path, scopes):
+    """Write the cache atomically so a concurrent reader never sees half a file."""
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(scopes, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass  # Caching is best effort
+
+def get_access_scopes(session, shop_url, access_token, use_cache=True):
     """Get the actual scopes granted to this access token."""
-    api_version = '2024-04'
+    cache_path = _scope_cache_path(shop_url, access_token)
+    if use_cache:
+        scopes = _read_cached_scopes(cache_path)
+        if scopes is not None:
+            print("Using cached token scopes (run with --no-cache to re-query Shopify)")
+            return scopes
+
     url = f"https://{shop_url}/admin/oauth/access_scopes.json"
-    headers = {
-        "X-Shopify-Access-Token": access_token,
-    }
 
     print("Querying Shopify for actual token scopes...")
-    response = requests.get(url, headers=headers)
+    response = session.get(url, timeout=10)
 
     if response.status_code == 200:
         data = response.json()
         scopes = data.get('access_scopes', [])
+        _write_cached_scopes(cache_path, scopes)
         return scopes
     else:
         print(f"Error getting scopes: HTTP {response.status_code}")
@@ -62,6 +100,8 @@ def main():
     parser = argparse.ArgumentParser(description='Check actual scopes of Shopify access token')
     parser.add_argument('-f', '--file', dest='credential_file',
                        help='Path to credential file')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Ignore cached scopes and query Shopify')
     args = parser.parse_args()
 
     if args.credential_file:
@@ -83,7 +123,9 @@ def main():
     print(f"Token: {access_token[:15]}...")
 
     print("\n" + "=" * 80)
-    scopes = get_access_scopes(shop_url, access_token)
+    session = create_session(access_token)
+    scopes = get_access_scopes(session, shop_url, access_token,
+                               use_cache=not args.no_cache)
 
     if scopes:
         print(f"\n✓ Found {len(scopes)} scope(s) granted to this token:\n")
@@ -95,30 +137,33 @@ def main():
         print("SCOPE ANALYSIS:")
         print("=" * 80)
 
-        scope_handles = [s.get('handle') for s in scopes]
+        scope_handles = {s.get('handle') for s in scopes}
 
         required_scopes = {
             'read_products': 'Required for product data',
             'read_inventory': 'Required for inventory levels and quantities',
             'read_locations': 'Required for location data in bulk operations'
         }
+        missing = required_scopes.keys() - scope_handles
 
         print("\nRequired scopes for inventory sync:")
         for scope, purpose in required_scopes.items():
-            if scope in scope_handles:
+            if scope not in missing:
                 print(f"  ✓ {scope:20s} - {purpose}")
             else:
                 print(f"  ✗ {scope:20s} - {purpose} [MISSING]")
 
-        missing = [s for s in required_scopes.keys() if s not in scope_handles]
         if missing:
-            print(f"\n⚠ WARNING: Missing required scopes: {', '.join(missing)}")
+            # Listed in required_scopes order so the output is stable
+            missing_list = [scope for scope in required_scopes if scope in missing]
+            print(f"\n⚠ WARNING: Missing required scopes: {', '.join(missing_list)}")
             print("\nTo fix:")
             print("1. Go to Shopify Admin > Settings > Apps and sales channels")
             print("2. Select your custom app > Configuration")
             print("3. Add the missing scopes listed above")
             print("4. Save and reinstall the app")
             print("5. Update your credential file with the new access token")
+            print("6. Re-run this check with --no-cache")
         else:
             print("\n✓ All required scopes are granted!")
 
@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+Shopify Probes
+
+Shared network layer for check_shopify_credentials.py and check_api_scopes.py.
+Both scripts ask the same shop the same questions (can we connect, which
+scopes are granted, does GraphQL work, can bulk operations run), so the
+probes live here and run once per session. The scripts only decide how to
+print the ProbeResults they get back.
+
+Usage:
+    session = create_session(access_token)
+    results = run_probes(session, shop_url, level="basic")   # or "full"
+"""
+
+import functools
+import importlib.util
+import json
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+API_VERSION = '2024-04'
+
+_SHOP_URL_TMPL = "https://{shop}/admin/api/{v}/{ep}"
+
+_SHOP_QUERY = """
+{
+  shop {
+    name
+    email
+    myshopifyDomain
+    primaryDomain { host }
+    plan { displayName }
+  }
+}
+"""
+
+# Root field -> (label, scope). Shopify answers a single query with
+# per-field ACCESS_DENIED errors whose path names the denied root.
+SCOPE_TESTS = {
+    'products': ('Products (read_products)', 'read_products'),
+    'inventoryItems': ('Inventory Items (read_inventory)', 'read_inventory'),
+    'locations': ('Locations (read_locations)', 'read_locations'),
+    'orders': ('Orders (read_orders)', 'read_orders'),
+}
+_SCOPE_QUERY = "{ %s }" % " ".join(
+    "%s(first: 1) { edges { node { id } } }" % root for root in SCOPE_TESTS
+)
+
+# Bulk operation status poll; the id travels as a variable so the
+# document text is identical on every request
+_POLL_QUERY = """
+query($id: ID!) {
+  node(id: $id) {
+    ... on BulkOperation {
+      id
+      status
+      errorCode
+      objectCount
+    }
+  }
+}
+"""
+
+# Bulk operation states after which polling can stop
+_TERMINAL_STATUSES = {'COMPLETED', 'FAILED', 'CANCELED', 'EXPIRED'}
+
+# Simplified bulk operation (just products, no inventory)
+BULK_PRODUCTS_QUERY = """
+mutation {
+  bulkOperationRunQuery(
+   query: \"\"\"
+    {
+      products(first: 10) {
+        edges {
+          node {
+            id
+            title
+          }
+        }
+      }
+    }
+    \"\"\"
+  ) {
+    bulkOperation {
+      id
+      status
+    }
+    userErrors {
+      field
+      message
+    }
+  }
+}
+"""
+
+# This is the ACTUAL query from get_shopify_data_current.py
+BULK_INVENTORY_QUERY = """
+mutation {
+  bulkOperationRunQuery(
+   query: \"\"\"
+    {
+      products {
+        edges {
+          node {
+            id
+            title
+            handle
+            status
+            variants {
+              edges {
+                node {
+                  id
+                  sku
+                  title
+                  inventoryQuantity
+                  inventoryItem {
+                    id
+                    tracked
+                    inventoryLevels {
+                      edges {
+                        node {
+                          id
+                          quantities(names: ["available", "on_hand", "committed", "incoming"]) {
+                            name
+                            quantity
+                          }
+                          location {
+                            id
+                            name
+                          }
+                        }
+                      }
+                    }
+                  }
+                }
+              }
+            }
+          }
+        }
+      }
+    }
+    \"\"\"
+  ) {
+    bulkOperation {
+      id
+      status
+    }
+    userErrors {
+      field
+      message
+    }
+  }
+}
+"""
+
+
+@dataclass
+class BulkProbeResult:
+    """Outcome of starting one bulk operation and polling it."""
+    ok: Optional[bool] = None
+    http_status: Optional[int] = None
+    body: str = ''
+    errors: list = field(default_factory=list)
+    user_errors: list = field(default_factory=list)
+    op_id: Optional[str] = None
+    initial_status: Optional[str] = None
+    poll_http_status: Optional[int] = None
+    status: Optional[str] = None
+    error_code: Optional[str] = None
+    object_count: Optional[str] = None
+
+
+@dataclass
+class ProbeResults:
+    """Everything the probes learned about one shop."""
+    shop_url: str
+    api_version: str = API_VERSION
+    error: Optional[str] = None
+    timed_out: bool = False
+    status_code: Optional[int] = None
+    body: str = ''
+    shop: dict = field(default_factory=dict)
+    graphql_errors: list = field(default_factory=list)
+    scope_status: Optional[int] = None
+    scopes: dict = field(default_factory=dict)
+    bulk_simple: Optional[BulkProbeResult] = None
+    bulk_inventory: Optional[BulkProbeResult] = None
+
+    @property
+    def connected(self):
+        return self.status_code == 200 and bool(self.shop)
+
+    @property
+    def graphql_ok(self):
+        return self.status_code == 200 and not self.graphql_errors
+
+
+@functools.lru_cache(maxsize=32)
+def _load_credential_module(abs_path, mtime):
+    """Execute a credential file once per (path, mtime)."""
+    spec = importlib.util.spec_from_file_location("shopify_creds", abs_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def load_credential_module(abs_path):
+    """Load a credential file, reloading it only when the file changes."""
+    return _load_credential_module(abs_path, os.path.getmtime(abs_path))
+
+def create_session(access_token):
+    """Create a keep-alive session shared by every probe against the shop."""
+    session = requests.Session()
+    session.headers.update({
+        "X-Shopify-Access-Token": access_token,
+        "Content-Type": "application/json"
+    })
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=8,
+        max_retries=Retry(total=3, backoff_factor=0.5,
+                          status_forcelist=[429, 500, 502, 503, 504],
+                          allowed_methods=frozenset(['GET']),
+                          respect_retry_after_header=True,
+                          raise_on_status=False)
+    )
+    session.mount("https://", adapter)
+    return session
+
+def _excerpt(response):
+    """First 200 bytes of a response body, for error messages."""
+    return response.content[:200].decode('utf-8', 'replace')
+
+def graphql_url(shop_url, api_version=API_VERSION):
+    return _SHOP_URL_TMPL.format(shop=shop_url, v=api_version, ep="graphql.json")
+
+def fetch_shop_info(session, shop_url, api_version=API_VERSION):
+    """Return (status_code, json, excerpt) for the shop query."""
+    response = session.post(graphql_url(shop_url, api_version),
+                            json={'query': _SHOP_QUERY}, timeout=10)
+    if response.status_code != 200:
+        return response.status_code, None, _excerpt(response)
+
+    return 200, _loads(response.content), ''
+
+def probe_scopes(session, shop_url, api_version=API_VERSION):
+    """Return (status_code, {scope: True/False/None})."""
+    response = session.post(graphql_url(shop_url, api_version),
+                            json={'query': _SCOPE_QUERY}, timeout=10)
+    if response.status_code != 200:
+        return response.status_code, {scope: None for _, scope in SCOPE_TESTS.values()}
+
+    data = _loads(response.content)
+    roots = data.get('data') or {}
+    denied, failed = set(), set()
+    for error in data.get('errors', []):
+        path = error.get('path') or []
+        if not path:
+            continue
+        if (error.get('extensions') or {}).get('code') == 'ACCESS_DENIED':
+            denied.add(path[0])
+        else:
+            failed.add(path[0])
+
+    scopes = {}
+    for root, (_, scope) in SCOPE_TESTS.items():
+        if root in denied:
+            scopes[scope] = False
+        elif roots.get(root) is not None and root not in failed:
+            scopes[scope] = True
+        else:
+            scopes[scope] = None
+
+    return 200, scopes
+
+def _poll_bulk(session, url, op_id, max_attempts=5, base_delay=0.1):
+    """Poll a bulk operation until it settles, backing off between polls.
+
+    Waits 0.1s, 0.2s, 0.4s ... capped at 2s (about 3s in total) with a
+    little jitter, retries on 429/5xx (honouring Retry-After) and stops
+    as soon as the operation reaches a terminal status or reports an
+    errorCode. Returns (status_code, node) from the last poll.
+    """
+    status_code, node, retry_after = None, {}, None
+    for attempt in range(max_attempts):
+        delay = min(2.0, base_delay * 2 ** attempt)
+        delay += random.uniform(0, delay / 4)
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        time.sleep(delay)
+
+        response = session.post(
+            url, json={'query': _POLL_QUERY, 'variables': {'id': op_id}}, timeout=10
+        )
+        status_code = response.status_code
+        if status_code == 200:
+            retry_after = None
+            node = ((_loads(response.content) or {}).get('data') or {}).get('node') or {}
+            status, error_code = node.get('status'), node.get('errorCode')
+            if error_code or status in _TERMINAL_STATUSES:
+                break
+        elif status_code in (429, 500, 502, 503, 504):
+            retry_after = response.headers.get('Retry-After')
+        else:
+            break
+
+    return status_code, node
+
+def run_bulk_probe(session, shop_url, query, api_version=API_VERSION):
+    """Start a bulk operation, poll it until it settles and return the outcome.
+
+    ok is True when the operation runs without errors, False when it is
+    rejected or fails, and None when its status could not be polled.
+    """
+    result = BulkProbeResult()
+    url = graphql_url(shop_url, api_version)
+    response = session.post(url, json={'query': query}, timeout=10)
+
+    result.http_status = response.status_code
+    if response.status_code != 200:
+        result.body = _excerpt(response)
+        result.ok = False
+        return result
+
+    data = _loads(response.content)
+    if 'errors' in data:
+        result.errors = [error.get('message') for error in data['errors']]
+        result.ok = False
+        return result
+
+    # Null-safe at every hop: GraphQL sends explicit nulls on failure
+    bulk_op = (data.get('data') or {}).get('bulkOperationRunQuery') or {}
+    result.user_errors = bulk_op.get('userErrors') or []
+    if result.user_errors:
+        result.ok = False
+        return result
+
+    operation = bulk_op.get('bulkOperation') or {}
+    if not operation:
+        result.ok = False
+        return result
+
+    result.op_id = operation.get('id')
+    result.initial_status = operation.get('status')
+
+    result.poll_http_status, node = _poll_bulk(session, url, result.op_id)
+    if result.poll_http_status != 200:
+        result.ok = None
+        return result
+
+    result.status, result.error_code, result.object_count = (
+        node.get('status'), node.get('errorCode'), node.get('objectCount'))
+    result.ok = not result.error_code
+    return result
+
+def run_probes(session, shop_url, level="basic", api_version=API_VERSION):
+    """Run each probe once and collect the answers in a ProbeResults.
+
+    level "basic" covers connection, scopes and GraphQL access; "full" also
+    starts the two bulk operations. The inventory bulk operation is skipped
+    when the scope probe already reports read_inventory as denied.
+    """
+    results = ProbeResults(shop_url=shop_url, api_version=api_version)
+    try:
+        status_code, data, body = fetch_shop_info(session, shop_url, api_version)
+        results.status_code, results.body = status_code, body
+        if status_code != 200:
+            return results
+
+        results.shop = (data.get('data') or {}).get('shop') or {}
+        results.graphql_errors = data.get('errors', [])
+        results.scope_status, results.scopes = probe_scopes(session, shop_url, api_version)
+
+        if level == "full" and results.graphql_ok:
+            results.bulk_simple = run_bulk_probe(
+                session, shop_url, BULK_PRODUCTS_QUERY, api_version)
+            if results.scopes.get('read_inventory') is not False:
+                results.bulk_inventory = run_bulk_probe(
+                    session, shop_url, BULK_INVENTORY_QUERY, api_version)
+    except requests.exceptions.Timeout as e:
+        results.timed_out = True
+        results.error = str(e)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        results.error = str(e)
+
+    return results
@@ -10,13 +10,22 @@ Usage:
     python3 diagnose_shopify_orders.py [--output filename.csv]
 """
 
-import pandas as pd
+import csv
 import xmlrpc.client
 import ssl
 import sys
 import argparse
+from collections import Counter, defaultdict
 from datetime import datetime
 
+from odoo_uid_cache import get_uid, call_with_uid
+
+CSV_FIELDS = [
+    'Order Reference', 'State', 'Date', 'Amount', 'Current Customer (partner_id)',
+    'Invoice Address', 'Shipping Address', 'Invoice Status', 'Delivery Status',
+    'Order Lines', 'Customer ID', 'Invoice Partner ID', 'Shipping Partner ID',
+]
+
 # Import credentials
 try:
     from odoosys import url, db, username, password
@@ -40,18 +49,21 @@ def main():
 
     # Connect to Odoo
     try:
-        common = xmlrpc.client.ServerProxy('{}/xmlrpc/2/common'.format(url),
-                                          use_datetime=True,
-                                          context=ssl._create_unverified_context())
-        uid = common.authenticate(db, username, password, {})
+        # One transport for both endpoints: xmlrpc keeps its HTTP/1.1
+        # connection alive, so every call reuses a single TLS handshake
+        if url.startswith('https'):
+            transport = xmlrpc.client.SafeTransport(use_datetime=True,
+                                                    context=ssl._create_unverified_context())
+        else:
+            transport = xmlrpc.client.Transport(use_datetime=True)
+        common = xmlrpc.client.ServerProxy('{}/xmlrpc/2/common'.format(url), transport=transport)
+        uid, cached = get_uid(common, url, db, username, password)
 
         if not uid:
             print("ERROR: Failed to authenticate with Odoo")
             sys.exit(1)
 
-        models = xmlrpc.client.ServerProxy('{}/xmlrpc/2/object'.format(url),
-                                          use_datetime=True,
-                                          context=ssl._create_unverified_context())
+        models = xmlrpc.client.ServerProxy('{}/xmlrpc/2/object'.format(url), transport=transport)
         print(f"✓ Connected successfully (user ID: {uid})\n")
 
     except Exception as e:
@@ -61,8 +73,11 @@ def main():
     # Find the 'Shopify' partner
     print("Searching for 'Shopify' contact...")
     try:
-        shopify_ids = models.execute_kw(db, uid, password, 'res.partner', 'search',
-            [[['name', '=', 'Shopify']]])
+        # First call with the uid: a stale cached one is replaced here
+        shopify_ids, uid = call_with_uid(
+            lambda uid: models.execute_kw(db, uid, password, 'res.partner', 'search',
+                [[['name', '=', 'Shopify']]]),
+            common, url, db, username, password, uid, cached)
 
         if not shopify_ids:
             print("ERROR: No contact named 'Shopify' found in Odoo")
@@ -71,7 +86,7 @@ def main():
 
         shopify_id = shopify_ids[0]
         shopify_info = models.execute_kw(db, uid, password, 'res.partner', 'read',
-            [[shopify_id]], {'fields': ['name', 'is_company', 'street', 'city', 'state_id', 'zip']})[0]
+            [[shopify_id]], {'fields': ['is_company', 'street', 'city']})[0]
 
         print(f"✓ Found 'Shopify' contact (ID: {shopify_id})")
         print(f"  Type: {'Company' if shopify_info['is_company'] else 'Individual'}")
@@ -103,80 +118,93 @@ def main():
     print("Extracting order details...")
     print("-"*80)
 
-    order_data = []
-
-    for order_id in order_ids:
-        try:
-            # Get order details
-            order = models.execute_kw(db, uid, password, 'sale.order', 'read',
-                [[order_id]],
-                {'fields': ['name', 'state', 'date_order', 'amount_total',
-                           'partner_id', 'partner_invoice_id', 'partner_shipping_id',
-                           'invoice_status', 'delivery_status']})[0]
-
-            # Get partner names
-            customer_name = order['partner_id'][1] if order['partner_id'] else 'N/A'
-            invoice_name = order['partner_invoice_id'][1] if order['partner_invoice_id'] else 'N/A'
-            shipping_name = order['partner_shipping_id'][1] if order['partner_shipping_id'] else 'N/A'
-
-            # Get order lines
-            line_ids = models.execute_kw(db, uid, password, 'sale.order.line', 'search',
-                [[['order_id', '=', order_id]]])
-
-            lines = []
-            if line_ids:
-                line_data = models.execute_kw(db, uid, password, 'sale.order.line', 'read',
-                    [line_ids],
-                    {'fields': ['product_id', 'name', 'product_uom_qty', 'price_unit']})
-                lines = [f"{l['name']} (qty: {l['product_uom_qty']})" for l in line_data]
-
-            # Check for related pickings/deliveries
-            picking_ids = models.execute_kw(db, uid, password, 'stock.picking', 'search',
-                [[['origin', '=', order['name']]]])
-
-            picking_status = "No deliveries"
-            if picking_ids:
-                pickings = models.execute_kw(db, uid, password, 'stock.picking', 'read',
-                    [picking_ids], {'fields': ['state', 'name']})
-                picking_status = ", ".join([f"{p['name']}:{p['state']}" for p in pickings])
-
-            # Print summary
-            print(f"\nOrder: {order['name']}")
-            print(f"  State: {order['state']}")
-            print(f"  Customer (partner_id): {customer_name}")
-            print(f"  Invoice Address: {invoice_name}")
-            print(f"  Shipping Address: {shipping_name}")
-            print(f"  Delivery Status: {picking_status}")
-
-            # Add to data list
-            order_data.append({
-                'Order Reference': order['name'],
-                'State': order['state'],
-                'Date': order['date_order'],
-                'Amount': order['amount_total'],
-                'Current Customer (partner_id)': customer_name,
-                'Invoice Address': invoice_name,
-                'Shipping Address': shipping_name,
-                'Invoice Status': order.get('invoice_status', 'N/A'),
-                'Delivery Status': picking_status,
-                'Order Lines': "; ".join(lines),
-                'Customer ID': order['partner_id'][0] if order['partner_id'] else None,
-                'Invoice Partner ID': order['partner_invoice_id'][0] if order['partner_invoice_id'] else None,
-                'Shipping Partner ID': order['partner_shipping_id'][0] if order['partner_shipping_id'] else None,
-            })
-
-        except Exception as e:
-            print(f"ERROR processing order {order_id}: {e}")
-            continue
-
-    # Export to CSV
-    print("\n" + "-"*80)
-    print(f"\nExporting to {args.output}...")
+    # Three batched reads for all orders instead of several calls per order
+    try:
+        orders = models.execute_kw(db, uid, password, 'sale.order', 'read',
+            [order_ids],
+            {'fields': ['name', 'state', 'date_order', 'amount_total',
+                       'partner_id', 'partner_invoice_id', 'partner_shipping_id',
+                       'invoice_status']})
 
-    df = pd.DataFrame(order_data)
-    df.to_csv(args.output, index=False)
+        order_lines = models.execute_kw(db, uid, password, 'sale.order.line', 'search_read',
+            [[['order_id', 'in', order_ids]]],
+            {'fields': ['order_id', 'name', 'product_uom_qty']})
 
-    print(f"✓ Exported {len(order_data)} orders to {args.output}")
+        pickings = models.execute_kw(db, uid, password, 'stock.picking', 'search_read',
+            [[['origin', 'in', [o['name'] for o in orders]]]],
+            {'fields': ['origin', 'state', 'name']})
+
+    except Exception as e:
+        print(f"ERROR: Failed to read order details: {e}")
+        sys.exit(1)
+
+    lines_by_order = defaultdict(list)
+    for l in order_lines:
+        lines_by_order[l['order_id'][0]].append(f"{l['name']} (qty: {l['product_uom_qty']})")
+
+    pickings_by_origin = defaultdict(list)
+    for p in pickings:
+        pickings_by_origin[p['origin']].append(f"{p['name']}:{p['state']}")
+
+    # Rows are streamed to the CSV as they are built and the summary is
+    # tallied in the same pass
+    exported = 0
+    state_counts = Counter()
+    shipping_counts = Counter()
+    match_count = 0
+    safe_count = 0
+    with open(args.output, 'w', newline='', encoding='utf-8') as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=CSV_FIELDS, lineterminator='\n')
+        writer.writeheader()
+
+        for order in orders:
+            try:
+                # Get partner names
+                customer_name = order['partner_id'][1] if order['partner_id'] else 'N/A'
+                invoice_name = order['partner_invoice_id'][1] if order['partner_invoice_id'] else 'N/A'
+                shipping_name = order['partner_shipping_id'][1] if order['partner_shipping_id'] else 'N/A'
+
+                lines = lines_by_order[order['id']]
+                picking_status = ", ".join(pickings_by_origin[order['name']]) or "No deliveries"
+
+                # Print summary
+                print(f"\nOrder: {order['name']}")
+                print(f"  State: {order['state']}")
+                print(f"  Customer (partner_id): {customer_name}")
+                print(f"  Invoice Address: {invoice_name}")
+                print(f"  Shipping Address: {shipping_name}")
+                print(f"  Delivery Status: {picking_status}")
+
+                # Write the CSV row
+                writer.writerow({
+                    'Order Reference': order['name'],
+                    'State': order['state'],
+                    'Date': order['date_order'],
+                    'Amount': order['amount_total'],
+                    'Current Customer (partner_id)': customer_name,
+                    'Invoice Address': invoice_name,
+                    'Shipping Address': shipping_name,
+                    'Invoice Status': order.get('invoice_status', 'N/A'),
+                    'Delivery Status': picking_status,
+                    'Order Lines': "; ".join(lines),
+                    'Customer ID': order['partner_id'][0] if order['partner_id'] else None,
+                    'Invoice Partner ID': order['partner_invoice_id'][0] if order['partner_invoice_id'] else None,
+                    'Shipping Partner ID': order['partner_shipping_id'][0] if order['partner_shipping_id'] else None,
+                })
+                exported += 1
+                state_counts[order['state']] += 1
+                shipping_counts[shipping_name] += 1
+                if shipping_name == invoice_name:
+                    match_count += 1
+                if picking_status == "No deliveries":
+                    safe_count += 1
+
+            except Exception as e:
+                print(f"ERROR processing order {order.get('name', order['id'])}: {e}")
+                continue
+
+    print("\n" + "-"*80)
+    print(f"\n✓ Exported {exported} orders to {args.output}")
 
     # Summary analysis
     print("\n" + "="*80)
@@ -184,22 +212,18 @@ def main():
     print("="*80)
 
     # Check where the correct customer might be stored
-    shipping_addresses = df['Shipping Address'].unique()
-
-    print(f"\nTotal problematic orders: {len(order_data)}")
-    print(f"States: {df['State'].value_counts().to_dict()}")
-    print(f"\nUnique Shipping Addresses found: {len(shipping_addresses)}")
+    print(f"\nTotal problematic orders: {exported}")
+    print(f"States: {dict(state_counts.most_common())}")
+    print(f"\nUnique Shipping Addresses found: {len(shipping_counts)}")
 
-    if len(shipping_addresses) <= 10:
+    if len(shipping_counts) <= 10:
         print("\nShipping addresses (potential actual customers):")
-        for addr in shipping_addresses:
-            count = len(df[df['Shipping Address'] == addr])
+        for addr, count in shipping_counts.items():
             print(f"  - {addr} ({count} order(s))")
 
     # Check if shipping address matches invoice address
-    matches = df[df['Shipping Address'] == df['Invoice Address']]
-    if len(matches) > 0:
-        print(f"\n⚠ Warning: {len(matches)} order(s) have Shipping = Invoice Address")
+    if match_count > 0:
+        print(f"\n⚠ Warning: {match_count} order(s) have Shipping = Invoice Address")
         print("  This means we cannot use shipping address to find the correct customer")
 
     # Recommendations
@@ -207,7 +231,7 @@ def main():
     print("RECOMMENDATIONS")
     print("="*80)
 
-    if len(df[df['Shipping Address'] != 'Shopify']) > 0:
+    if any(addr != 'Shopify' for addr in shipping_counts):
         print("\n✓ SOLUTION IDENTIFIED:")
         print("  The 'Shipping Address' (partner_shipping_id) contains the actual customers.")
         print("  An update script can safely copy partner_shipping_id → partner_id")
@@ -219,11 +243,10 @@ def main():
         print("  to their correct customers, then update them individually.")
 
     # Check for safe vs risky updates
-    safe_orders = df[df['Delivery Status'] == 'No deliveries']
-    print(f"\n✓ {len(safe_orders)} order(s) are SAFE to update (no deliveries)")
+    print(f"\n✓ {safe_count} order(s) are SAFE to update (no deliveries)")
 
-    if len(safe_orders) < len(df):
-        print(f"⚠ {len(df) - len(safe_orders)} order(s) have deliveries - need careful handling")
+    if safe_count < exported:
+        print(f"⚠ {exported - safe_count} order(s) have deliveries - need careful handling")
 
     print("\n" + "="*80)
     print(f"Review the exported file: {args.output}")
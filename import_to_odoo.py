@@ -3,20 +3,26 @@
 Import to Odoo from CSV Files
 
 This script reads the generated CSV files (01_contacts_upload.csv and 02_orders_upload.csv)
-and imports them directly into Odoo via XML-RPC API.
+and imports them directly into Odoo via the JSON-RPC API.
 
 Automates the manual CSV import process.
 """
 
-import pandas as pd
-import xmlrpc.client
-import ssl
+import csv
+import functools
+import hashlib
+import json
+import time
 import sys
 import os
 import argparse
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from dateutil import parser as date_parser
 
+from odoo_jsonrpc import JsonRpcProxy, create_session
+
 # Import credentials
 try:
     from odoosys import url, db, username, password
@@ -28,16 +34,37 @@ except ImportError:
 CONTACTS_FILE = '01_contacts_upload.csv'
 ORDERS_FILE = '02_orders_upload.csv'
 
-# Odoo connection
+# Sale orders created concurrently per chunk
+ORDER_WORKERS = 8
+
+# CSVs are read in chunks of this many rows
+CSV_CHUNK_SIZE = 50_000
+
+# Values per 'in' domain when prefetching, to keep each query bounded
+IN_BATCH_SIZE = 1000
+
+# Contacts per res.partner load call (each call is one transaction)
+LOAD_BATCH_SIZE = 1000
+
+# SKU -> product.product ID from earlier runs; --refresh-cache ignores it
+SKU_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'odoo_sku')
+SKU_CACHE_TTL = 24 * 60 * 60  # seconds
+CONTACT_COLUMNS = ['Name', 'Email', 'Street', 'City', 'Zip', 'State', 'Country', 'Phone']
+ORDER_COLUMNS = ['Order Reference', 'Customer', 'Invoice Address', 'Delivery Address', 'Order Date',
+                 'Order Lines/Product', 'OrderLines/Quantity', 'OrderLines/Price_unit']
+
+# Odoo connection (certificates are not verified, as with the XML-RPC client before)
 print("Connecting to Odoo...")
-common = xmlrpc.client.ServerProxy('{}/xmlrpc/2/common'.format(url), use_datetime=True, context=ssl._create_unverified_context())
+session = create_session()
+
+common = JsonRpcProxy(session, url, 'common')
 uid = common.authenticate(db, username, password, {})
 
 if not uid:
     print("ERROR: Failed to authenticate with Odoo")
     sys.exit(1)
 
-models = xmlrpc.client.ServerProxy('{}/xmlrpc/2/object'.format(url), use_datetime=True, context=ssl._create_unverified_context())
+models = JsonRpcProxy(session, url, 'object')
 print(f"✓ Connected to Odoo as user ID: {uid}")
 
 # ============================================================================
@@ -59,8 +86,12 @@ def format_datetime_for_odoo(date_string):
         return None
 
     try:
-        # Parse the datetime string (handles timezone automatically)
-        dt = date_parser.parse(date_string)
+        # Shopify dates are ISO 8601, which fromisoformat handles directly;
+        # anything else goes through the slower generic dateutil parser
+        try:
+            dt = datetime.fromisoformat(date_string.replace('Z', '+00:00'))
+        except ValueError:
+            dt = date_parser.parse(date_string)
 
         # Convert to naive datetime (remove timezone) and format for Odoo
         return dt.replace(tzinfo=None).strftime('%Y-%m-%d %H:%M:%S')
@@ -69,19 +100,147 @@ def format_datetime_for_odoo(date_string):
         # Fallback to current datetime
         return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
-def get_or_create_partner(name, email='', street='', city='', zip_code='', state='', country='', phone=''):
+# Partners found or created by name when no prefetched dict is passed to
+# get_or_create_partner(). Only hits are stored: a miss is followed by a create.
+PARTNER_IDS = {}
+
+# Country and state IDs by code, filled by load_country_codes() on first use.
+# STATES is keyed by (country ID, code); (None, code) holds the first state
+# found with that code for partners without a country.
+COUNTRIES = {}
+STATES = {}
+
+def load_country_codes():
+    """
+    Load every res.country and res.country.state code once per run.
+    Both tables are small and never change during an import.
+    """
+    if COUNTRIES:
+        return
+    for record in models.execute_kw(db, uid, password, 'res.country', 'search_read',
+            [[]], {'fields': ['code']}):
+        if record['code']:
+            COUNTRIES[record['code']] = record['id']
+    for record in models.execute_kw(db, uid, password, 'res.country.state', 'search_read',
+            [[]], {'fields': ['code', 'country_id']}):
+        country_id = record['country_id'][0] if record['country_id'] else None
+        STATES.setdefault((country_id, record['code']), record['id'])
+        STATES.setdefault((None, record['code']), record['id'])
+
+def batched_in_search(model, field, values, fields):
+    """
+    search_read records whose field is in values, IN_BATCH_SIZE values per
+    request. Returns the records of all batches in order.
+    """
+    values = list(values)
+    records = []
+    for start in range(0, len(values), IN_BATCH_SIZE):
+        records.extend(models.execute_kw(db, uid, password, model, 'search_read',
+            [[[field, 'in', values[start:start + IN_BATCH_SIZE]]]], {'fields': fields}))
+    return records
+
+def prefetch_partners(names):
+    """
+    Look up existing partners for all names with batched search_reads.
+    Returns dict {name: partner ID}; the first match wins, as with search.
+    """
+    if not names:
+        return {}
+    records = batched_in_search('res.partner', 'name', names, ['name'])
+    partners = {}
+    for record in records:
+        partners.setdefault(record['name'], record['id'])
+    return partners
+
+def prefetch_products(skus):
+    """
+    Look up product.product IDs for all SKUs with batched search_reads.
+    Returns dict {sku: product ID}; SKUs not in Odoo are absent.
+    """
+    if not skus:
+        return {}
+    records = batched_in_search('product.product', 'default_code', skus, ['default_code'])
+    products = {}
+    for record in records:
+        products.setdefault(record['default_code'], record['id'])
+    return products
+
+def _sku_cache_path():
+    key = hashlib.sha1(f"{url}|{db}".encode()).hexdigest()
+    return os.path.join(SKU_CACHE_DIR, f"{key}.json")
+
+def _read_cached_skus(cache_path):
+    """Return the cache as {sku: [product ID, time looked up]}, minus expired entries."""
+    try:
+        with open(cache_path) as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    now = time.time()
+    return {sku: entry for sku, entry in entries.items() if now - entry[1] < SKU_CACHE_TTL}
+
+def _write_cached_skus(cache_path, products, cached):
+    """
+    Store products, keeping the lookup time of entries that came from the
+    cache so they still expire on schedule. Written atomically so a
+    concurrent reader never sees half a file.
+    """
+    now = time.time()
+    entries = {sku: [product_id, cached[sku][1] if sku in cached else now]
+               for sku, product_id in products.items()}
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass  # Caching is best effort
+
+def prefetch_existing_orders(order_refs):
+    """
+    Return the set of order references that already exist as sale orders.
+    """
+    if not order_refs:
+        return set()
+    records = batched_in_search('sale.order', 'name', order_refs, ['name'])
+    return {record['name'] for record in records}
+
+def get_or_create_partner(name, email='', street='', city='', zip_code='', state='', country='', phone='',
+                          partners=None):
     """
     Get existing partner by name or create new one.
     Returns partner ID.
+
+    partners: optional {name: partner ID} dict from prefetch_partners(). When
+    given, it replaces the per-name search and new partners are added to it.
+    Without it, names already found or created in this run come from
+    PARTNER_IDS.
     """
-    # Search for existing partner by name
-    partner_ids = models.execute_kw(db, uid, password, 'res.partner', 'search',
-        [[['name', '=', name]]])
+    if partners is not None:
+        if name in partners:
+            return partners[name]
+    else:
+        partners = PARTNER_IDS
+        if name in partners:
+            return partners[name]
+
+        # Search for existing partner by name
+        partner_ids = models.execute_kw(db, uid, password, 'res.partner', 'search',
+            [[['name', '=', name]]], {'limit': 1})
 
-    if partner_ids:
-        return partner_ids[0]
+        if partner_ids:
+            partners[name] = partner_ids[0]
+            return partner_ids[0]
 
     # Create new partner
+    partner_data = partner_values(name, email, street, city, zip_code, state, country, phone)
+    partner_id = models.execute_kw(db, uid, password, 'res.partner', 'create', [partner_data])
+    partners[name] = partner_id
+    return partner_id
+
+def partner_values(name, email='', street='', city='', zip_code='', state='', country='', phone=''):
+    """Build res.partner values for a new contact, resolving country and state codes."""
     partner_data = {
         'name': name,
         'email': email or False,
@@ -93,88 +252,128 @@ def get_or_create_partner(name, email='', street='', city='', zip_code='', state
         'type': 'contact'
     }
 
-    # Handle state (need to find state ID by code or name)
+    # Handle country and state codes from the preloaded tables
+    load_country_codes()
+    country_id = COUNTRIES.get(country) if country else None
+    if country_id:
+        partner_data['country_id'] = country_id
+
     if state:
-        state_ids = models.execute_kw(db, uid, password, 'res.country.state', 'search',
-            [[['code', '=', state]]])
-        if state_ids:
-            partner_data['state_id'] = state_ids[0]
-
-    # Handle country (need to find country ID by code)
-    if country:
-        country_ids = models.execute_kw(db, uid, password, 'res.country', 'search',
-            [[['code', '=', country]]])
-        if country_ids:
-            partner_data['country_id'] = country_ids[0]
+        # State codes repeat between countries, so prefer the partner's country
+        state_id = STATES.get((country_id, state)) or STATES.get((None, state))
+        if state_id:
+            partner_data['state_id'] = state_id
 
-    partner_id = models.execute_kw(db, uid, password, 'res.partner', 'create', [partner_data])
-    return partner_id
+    return partner_data
+
+# Column order for load_partners(); relational fields take database IDs
+PARTNER_LOAD_FIELDS = ['name', 'email', 'street', 'city', 'zip', 'phone', 'is_company', 'type',
+                       'country_id/.id', 'state_id/.id']
+
+def load_partners(values):
+    """
+    Create partners from a list of partner_values() dicts with one
+    res.partner load call, which Odoo runs as a single import transaction.
 
-def get_product_by_sku(sku):
+    Returns (IDs in the order given, None), or (None, error messages) if
+    Odoo rejected any row, in which case nothing was created.
+    """
+    data = []
+    for partner_data in values:
+        row = []
+        for field in PARTNER_LOAD_FIELDS:
+            value = partner_data.get(field.split('/')[0])
+            row.append('' if value is None or value is False else str(value))
+        data.append(row)
+
+    result = models.execute_kw(db, uid, password, 'res.partner', 'load', [PARTNER_LOAD_FIELDS, data])
+    errors = [m.get('message') for m in result.get('messages') or [] if m.get('type') == 'error']
+    if errors or not result.get('ids'):
+        return None, errors or ['no records created']
+    return result['ids'], None
+
+def get_product_by_sku(sku, products=None):
     """
     Get product.product ID by SKU (default_code).
     Returns product ID or None if not found.
+
+    products: optional {sku: product ID} dict from prefetch_products().
+    Without it, each SKU is searched once per run.
+    """
+    if products is not None:
+        return products.get(sku)
+    return search_product_by_sku(sku)
+
+@functools.lru_cache(maxsize=8192)
+def search_product_by_sku(sku):
+    """
+    Search Odoo for a product.product ID by SKU; None if not found.
+    Cached, as the importer never creates products.
     """
     # First search product.template
     template_ids = models.execute_kw(db, uid, password, 'product.template', 'search',
-        [[['default_code', '=', sku]]])
+        [[['default_code', '=', sku]]], {'limit': 1})
 
     if not template_ids:
         return None
 
     # Get product.product variant
     product_ids = models.execute_kw(db, uid, password, 'product.product', 'search',
-        [[['product_tmpl_id', '=', template_ids[0]], ['default_code', '=', sku]]])
+        [[['product_tmpl_id', '=', template_ids[0]], ['default_code', '=', sku]]], {'limit': 1})
 
     if product_ids:
         return product_ids[0]
 
     return None
 
-def get_product_available_qty(product_id):
+def get_available_quantities(product_ids):
     """
-    Get available quantity for a product across all internal locations.
-    Returns total available quantity.
+    Get available quantity for each product across all internal locations.
+    One stock.quant read_group sums on-hand and reserved per product.
+    Returns dict {product ID: available}; products without stock are absent.
     """
+    if not product_ids:
+        return {}
     try:
-        # Query stock.quant for this product in internal locations
-        quants = models.execute_kw(db, uid, password, 'stock.quant', 'search_read',
-            [[['product_id', '=', product_id],
-              ['location_id.usage', '=', 'internal']]],
-            {'fields': ['quantity', 'reserved_quantity']})
-
-        # Calculate available = on_hand - reserved
-        total_available = 0
-        for quant in quants:
-            on_hand = float(quant.get('quantity', 0))
-            reserved = float(quant.get('reserved_quantity', 0))
-            available = on_hand - reserved
-            total_available += available
-
-        return total_available
+        groups = models.execute_kw(db, uid, password, 'stock.quant', 'read_group',
+            [[['product_id', 'in', list(product_ids)],
+              ['location_id.usage', '=', 'internal']],
+             ['product_id', 'quantity:sum', 'reserved_quantity:sum'],
+             ['product_id']],
+            {'lazy': False})
     except Exception as e:
-        print(f"    WARNING: Could not check stock for product ID {product_id}: {e}")
-        return 0
+        print(f"    WARNING: Could not check stock for {len(product_ids)} product(s): {e}")
+        return {}
 
-def check_order_availability(line_items_with_products):
+    # Available = on_hand - reserved
+    return {
+        group['product_id'][0]: float(group.get('quantity') or 0) - float(group.get('reserved_quantity') or 0)
+        for group in groups
+    }
+
+def check_order_availability(line_items_with_products, available=None):
     """
     Check if all line items have sufficient stock.
 
     Args:
         line_items_with_products: List of dicts with keys: product_id, product_sku, quantity
+        available: Optional {product ID: available qty} from get_available_quantities();
+                   fetched for just these products when not given
 
     Returns:
         Tuple (all_available: bool, availability_details: list of dicts)
     """
+    if available is None:
+        available = get_available_quantities({line['product_id'] for line in line_items_with_products})
+
     availability_details = []
     all_available = True
 
     for line in line_items_with_products:
-        product_id = line['product_id']
         sku = line['product_sku']
         qty_needed = float(line['quantity'])
 
-        qty_available = get_product_available_qty(product_id)
+        qty_available = available.get(line['product_id'], 0)
         is_available = qty_available >= qty_needed
 
         if not is_available:
@@ -189,28 +388,33 @@ def check_order_availability(line_items_with_products):
 
     return all_available, availability_details
 
-def create_sale_order(order_ref, customer_name, invoice_address_name, delivery_address_name,
-                      order_date, line_items, auto_confirm=False):
+def build_sale_order(order_ref, customer_name, invoice_address_name, delivery_address_name,
+                     order_date, line_items, partners=None, products=None):
     """
-    Create a sale order (quotation) in Odoo.
+    Resolve partners and products and build the values for a sale order
+    (quotation) in Odoo. Partners that don't exist yet are created here, so
+    run this from the main thread.
 
     Args:
         order_ref: Order reference (e.g., #10992)
         customer_name: Customer name
         invoice_address_name: Invoice address (e.g., "Shopify")
         delivery_address_name: Delivery address name
-        order_date: Order date string
+        order_date: Order date already in Odoo's format (see
+                    format_datetime_for_odoo()), or None for now
         line_items: List of dicts with keys: product_sku, quantity, price_unit
-        auto_confirm: If True, confirm order if all items are in stock
+        partners: Optional {name: partner ID} dict from prefetch_partners()
+        products: Optional {sku: product ID} dict from prefetch_products()
 
     Returns:
-        Tuple (Sale order ID or None if failed, order_status: 'confirmed' or 'quotation')
+        Tuple (sale.order create values, lines with products for the stock
+        check), or (None, None) if none of the SKUs exist in Odoo
     """
     # Get or create customer partner
-    customer_id = get_or_create_partner(customer_name)
+    customer_id = get_or_create_partner(customer_name, partners=partners)
 
     # Get or create invoice address partner
-    invoice_id = get_or_create_partner(invoice_address_name)
+    invoice_id = get_or_create_partner(invoice_address_name, partners=partners)
 
     # Get or create delivery address partner (same as customer for now)
     delivery_id = customer_id
@@ -221,77 +425,198 @@ def create_sale_order(order_ref, customer_name, invoice_address_name, delivery_a
         'partner_id': customer_id,
         'partner_invoice_id': invoice_id,
         'partner_shipping_id': delivery_id,
-        'date_order': format_datetime_for_odoo(order_date) or datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'date_order': order_date or datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
     }
 
-    # Create the sale order first (without lines)
-    try:
-        order_id = models.execute_kw(db, uid, password, 'sale.order', 'create', [order_data])
-    except Exception as e:
-        print(f"  ERROR creating order {order_ref}: {e}")
-        return None, None
-
-    # Add order lines
-    lines_created = 0
+    # Resolve products and build the lines as (0, 0, vals) commands so the
+    # order and all its lines are created in a single call
+    order_lines = []
     lines_with_products = []  # Track products for availability check
 
     for line in line_items:
-        product_id = get_product_by_sku(line['product_sku'])
+        product_id = get_product_by_sku(line['product_sku'], products)
 
         if not product_id:
-            print(f"  WARNING: Product SKU '{line['product_sku']}' not found in Odoo - skipping line")
+            print(f"  WARNING: {order_ref}: Product SKU '{line['product_sku']}' not found in Odoo - skipping line")
             continue
 
-        line_data = {
-            'order_id': order_id,
+        order_lines.append((0, 0, {
             'product_id': product_id,
             'product_uom_qty': float(line['quantity']),
             'price_unit': float(line['price_unit']),
-        }
+        }))
+        lines_with_products.append({
+            'product_id': product_id,
+            'product_sku': line['product_sku'],
+            'quantity': line['quantity']
+        })
+
+    if not order_lines:
+        print(f"  WARNING: No lines to create for order {order_ref} - skipping order")
+        return None, None
+
+    order_data['order_line'] = order_lines
+    return order_data, lines_with_products
+
+def create_sale_order(order_data):
+    """
+    Create a sale order with its lines in a single call and return its ID.
+    Odoo rolls the whole call back if any line is rejected, so there is
+    nothing to clean up on failure. Safe to call from worker threads.
+    """
+    return models.execute_kw(db, uid, password, 'sale.order', 'create', [order_data])
+
+def order_in_stock(lines_with_products, available=None):
+    """
+    Run and print the stock check for one order.
+
+    Args:
+        lines_with_products: Lines from build_sale_order()
+        available: Optional {product ID: available qty} dict from
+                   get_available_quantities()
+
+    Returns:
+        True if every line is in stock
+    """
+    all_available, availability_details = check_order_availability(lines_with_products, available)
 
+    # Show availability status
+    print(f"    Stock check:")
+    for detail in availability_details:
+        status_icon = '✓' if detail['is_available'] else '✗'
+        print(f"      {status_icon} {detail['sku']}: need {int(detail['qty_needed'])}, available {int(detail['qty_available'])}")
+
+    if all_available:
+        print(f"    ✓ All items in stock - order will be CONFIRMED")
+    else:
+        print(f"    ⊘ Order left as QUOTATION (insufficient stock)")
+    return all_available
+
+def reserve_stock(available, lines_with_products, sign=1):
+    """Deduct an order's quantities from available (sign=-1 gives them back)."""
+    if available is None:
+        return
+    for line in lines_with_products:
+        available[line['product_id']] = (
+            available.get(line['product_id'], 0) - sign * float(line['quantity']))
+
+def confirm_orders(order_ids):
+    """
+    Confirm orders (convert quotations to sales orders) with one
+    action_confirm call. One bad order rolls back the whole call, so on
+    failure each order is retried on its own.
+
+    Returns:
+        Dict {order ID: error message} for orders that could not be confirmed
+    """
+    if not order_ids:
+        return {}
+    try:
+        models.execute_kw(db, uid, password, 'sale.order', 'action_confirm', [list(order_ids)])
+        return {}
+    except Exception:
+        pass
+
+    failed = {}
+    for order_id in order_ids:
         try:
-            models.execute_kw(db, uid, password, 'sale.order.line', 'create', [line_data])
-            lines_created += 1
-
-            # Track for availability check
-            lines_with_products.append({
-                'product_id': product_id,
-                'product_sku': line['product_sku'],
-                'quantity': line['quantity']
-            })
+            models.execute_kw(db, uid, password, 'sale.order', 'action_confirm', [[order_id]])
         except Exception as e:
-            print(f"  ERROR creating order line for {line['product_sku']}: {e}")
+            failed[order_id] = str(e)
+    return failed
 
-    if lines_created == 0:
-        print(f"  WARNING: No lines created for order {order_ref} - deleting order")
-        models.execute_kw(db, uid, password, 'sale.order', 'unlink', [[order_id]])
-        return None, None
+def create_orders(orders, existing_orders, auto_confirm=False, partners=None, products=None,
+                  available=None):
+    """
+    Create a batch of orders, sending the creates ORDER_WORKERS at a time.
+
+    Orders are built (and any missing partners created) in file order on
+    the main thread; only the independent sale.order creates run in the
+    pool. Results and stock checks are then handled in file order, so the
+    output reads the same as a serial run, and the orders that pass the
+    stock check are confirmed together in one call at the end.
+
+    Args:
+        orders: List of (order_ref, customer, invoice_addr, delivery_addr, date, lines) tuples
+        existing_orders: Set of order references already in Odoo; updated as orders are created
+        auto_confirm: If True, confirm orders whose items are all in stock
+        partners, products: As for build_sale_order()
+        available: Optional {product ID: available qty} dict from
+                   get_available_quantities(); confirmed quantities are
+                   deducted from it so later orders see the remaining stock
+
+    Returns:
+        Counter with keys created, confirmed, quotation, skipped
+    """
+    counts = Counter()
+    built = []
+    to_confirm = []  # (order_ref, order_id, lines_with_products)
+    for order in orders:
+        order_ref = order[0]
+        # Check if order already exists by name (or earlier in this file)
+        if order_ref in existing_orders:
+            print(f"  ⊘ Skipped: {order_ref} (already exists)")
+            counts['skipped'] += 1
+            continue
 
-    # Track order status
-    order_status = 'quotation'
+        order_data, lines_with_products = build_sale_order(*order, partners=partners, products=products)
+        if order_data is None:
+            print(f"  ✗ Failed: {order_ref}")
+            continue
+        existing_orders.add(order_ref)
+        built.append((order_ref, len(order[5]), order_data, lines_with_products))
 
-    # Check availability and confirm if requested
-    if auto_confirm and lines_with_products:
-        all_available, availability_details = check_order_availability(lines_with_products)
+    if not built:
+        return counts
 
-        # Show availability status
-        print(f"    Stock check:")
-        for detail in availability_details:
-            status_icon = '✓' if detail['is_available'] else '✗'
-            print(f"      {status_icon} {detail['sku']}: need {int(detail['qty_needed'])}, available {int(detail['qty_available'])}")
+    with ThreadPoolExecutor(max_workers=min(ORDER_WORKERS, len(built))) as executor:
+        futures = [executor.submit(create_sale_order, order_data) for _, _, order_data, _ in built]
 
-        if all_available:
+        for (order_ref, line_count, _, lines_with_products), future in zip(built, futures):
             try:
-                # Confirm the order (convert quotation to sales order)
-                models.execute_kw(db, uid, password, 'sale.order', 'action_confirm', [[order_id]])
-                print(f"    ✓ Order CONFIRMED (all items in stock)")
-                order_status = 'confirmed'
+                order_id = future.result()
             except Exception as e:
-                print(f"    WARNING: Could not confirm order: {e}")
-        else:
-            print(f"    ⊘ Order left as QUOTATION (insufficient stock)")
+                print(f"  ERROR creating order {order_ref}: {e}")
+                print(f"  ✗ Failed: {order_ref}")
+                existing_orders.discard(order_ref)
+                continue
+
+            # Check availability; stock for orders that will be confirmed is
+            # held back so later orders only see what remains
+            if auto_confirm and order_in_stock(lines_with_products, available):
+                reserve_stock(available, lines_with_products)
+                to_confirm.append((order_ref, order_id, lines_with_products))
 
-    return order_id, order_status
+            print(f"  ✓ Created: {order_ref} (ID: {order_id}, {line_count} line(s))")
+            counts['created'] += 1
+
+    failed = confirm_orders([order_id for _, order_id, _ in to_confirm])
+    for order_ref, order_id, lines_with_products in to_confirm:
+        if order_id in failed:
+            print(f"  WARNING: Could not confirm order {order_ref}: {failed[order_id]}")
+            reserve_stock(available, lines_with_products, sign=-1)
+    if to_confirm:
+        print(f"  ✓ Confirmed {len(to_confirm) - len(failed)} order(s) (all items in stock)")
+
+    counts['confirmed'] += len(to_confirm) - len(failed)
+    counts['quotation'] += counts['created'] - counts['confirmed']
+    return counts
+
+def read_csv_chunks(filename, columns):
+    """
+    Yield a CSV as lists of up to CSV_CHUNK_SIZE rows. Each row is a tuple
+    of stripped strings in the order of columns; missing columns and empty
+    cells are ''.
+    """
+    with open(filename, newline='', encoding='utf-8-sig') as f:
+        chunk = []
+        for row in csv.DictReader(f):
+            chunk.append(tuple((row.get(column) or '').strip() for column in columns))
+            if len(chunk) >= CSV_CHUNK_SIZE:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
 
 # ============================================================================
 # IMPORT CONTACTS
@@ -308,48 +633,76 @@ def import_contacts():
     print(f"{'='*80}")
 
     try:
-        df = pd.read_csv(CONTACTS_FILE)
-        df = df.fillna('')
-
-        if len(df) == 0:
-            print("  No contacts to import (file is empty)")
-            return 0
-
-        print(f"  Found {len(df)} contact(s) to import")
-
+        total = 0
         created = 0
         skipped = 0
+        partners = {}
+
+        for chunk in read_csv_chunks(CONTACTS_FILE, CONTACT_COLUMNS):
+            total += len(chunk)
+            print(f"  Found {len(chunk)} contact(s) to import")
+
+            # One lookup for every new name in the chunk instead of a search per row
+            partners.update(prefetch_partners({row[0] for row in chunk if row[0]} - partners.keys()))
+
+            # New contacts are created in LOAD_BATCH_SIZE batches of one load call each
+            new_contacts = {}
+            for name, email, street, city, zip_code, state, country, phone in chunk:
+                if not name:
+                    continue
+
+                # Check if already exists (or appeared earlier in the file)
+                if name in partners or name in new_contacts:
+                    print(f"  ⊘ Skipped: {name} (already exists)")
+                    skipped += 1
+                    continue
+
+                new_contacts[name] = (email, street, city, zip_code, state, country, phone)
+
+            names = list(new_contacts)
+            for start in range(0, len(names), LOAD_BATCH_SIZE):
+                batch = names[start:start + LOAD_BATCH_SIZE]
+                try:
+                    partner_ids, errors = load_partners(
+                        [partner_values(name, *new_contacts[name]) for name in batch])
+                except Exception as e:
+                    partner_ids, errors = None, [str(e)]
+
+                if partner_ids:
+                    for name, partner_id in zip(batch, partner_ids):
+                        partners[name] = partner_id
+                        print(f"  ✓ Created: {name} (ID: {partner_id})")
+                    created += len(batch)
+                    continue
+
+                # Odoo rolled the whole batch back; create one by one so only
+                # the bad rows fail
+                print(f"  WARNING: Batch import of {len(batch)} contact(s) failed ({errors[0]}) "
+                      f"- creating them one at a time")
+                for name in batch:
+                    email, street, city, zip_code, state, country, phone = new_contacts[name]
+                    try:
+                        partner_id = get_or_create_partner(
+                            name=name,
+                            email=email,
+                            street=street,
+                            city=city,
+                            zip_code=zip_code,
+                            state=state,
+                            country=country,
+                            phone=phone,
+                            partners=partners
+                        )
+                        print(f"  ✓ Created: {name} (ID: {partner_id})")
+                        created += 1
+                    except Exception as e:
+                        print(f"  ✗ Failed: {name} - {e}")
 
-        for idx, row in df.iterrows():
-            name = row.get('Name', '')
-            if not name:
-                continue
-
-            # Check if already exists
-            existing = models.execute_kw(db, uid, password, 'res.partner', 'search',
-                [[['name', '=', name]]])
-
-            if existing:
-                print(f"  ⊘ Skipped: {name} (already exists)")
-                skipped += 1
-                continue
+            sys.stdout.flush()
 
-            # Create contact
-            try:
-                partner_id = get_or_create_partner(
-                    name=name,
-                    email=row.get('Email', ''),
-                    street=row.get('Street', ''),
-                    city=row.get('City', ''),
-                    zip_code=row.get('Zip', ''),
-                    state=row.get('State', ''),
-                    country=row.get('Country', ''),
-                    phone=row.get('Phone', '')
-                )
-                print(f"  ✓ Created: {name} (ID: {partner_id})")
-                created += 1
-            except Exception as e:
-                print(f"  ✗ Failed: {name} - {e}")
+        if total == 0:
+            print("  No contacts to import (file is empty)")
+            return 0
 
         print(f"\n  Summary: {created} created, {skipped} skipped")
         return created
@@ -362,8 +715,13 @@ def import_contacts():
 # IMPORT ORDERS
 # ============================================================================
 
-def import_orders(auto_confirm=False):
-    """Import orders from 02_orders_upload.csv"""
+def import_orders(auto_confirm=False, refresh_cache=False):
+    """
+    Import orders from 02_orders_upload.csv
+
+    SKUs resolved in the last SKU_CACHE_TTL are taken from the on-disk cache
+    (unless refresh_cache is set); only the rest are looked up in Odoo.
+    """
     if not os.path.exists(ORDERS_FILE):
         print(f"\n⚠ {ORDERS_FILE} not found - skipping order import")
         return 0, 0, 0
@@ -375,102 +733,100 @@ def import_orders(auto_confirm=False):
     print(f"{'='*80}")
 
     try:
-        df = pd.read_csv(ORDERS_FILE)
-        df = df.fillna('')
-
-        if len(df) == 0:
+        total = 0
+        existing_orders = set()
+        partners = {}
+        sku_cache_path = _sku_cache_path()
+        cached_skus = {} if refresh_cache else _read_cached_skus(sku_cache_path)
+        products = {sku: entry[0] for sku, entry in cached_skus.items()}
+        available = {}  # Stock per product ID, only filled when auto-confirming
+
+        # Group by order (when Order Reference is not blank, it's a new order).
+        # The current order, (order_ref, customer, invoice_addr,
+        # delivery_addr, date, lines), carries over between chunks.
+        current = None
+        pending = []  # Completed orders not yet created
+
+        counts = Counter()
+
+        def flush_orders(include_current=False):
+            """Create the pending orders, plus the current one at end of file."""
+            if include_current and current and current[5]:
+                pending.append(current)
+            counts.update(create_orders(pending, existing_orders, auto_confirm=auto_confirm,
+                                        partners=partners, products=products, available=available))
+            pending.clear()
+            sys.stdout.flush()
+
+        def column_values(chunk, *columns):
+            values = set()
+            for column in columns:
+                index = ORDER_COLUMNS.index(column)
+                values.update(row[index] for row in chunk)
+            values.discard('')
+            return values
+
+        for chunk in read_csv_chunks(ORDERS_FILE, ORDER_COLUMNS):
+            total += len(chunk)
+            print(f"  Found {len(chunk)} line(s) to process")
+
+            # Resolve the chunk's order references, partners and SKUs up front
+            # so the loop below only talks to Odoo to create orders
+            existing_orders |= prefetch_existing_orders(
+                column_values(chunk, 'Order Reference') - existing_orders)
+            partners.update(prefetch_partners(
+                column_values(chunk, 'Customer', 'Invoice Address') - partners.keys()))
+            chunk_skus = column_values(chunk, 'Order Lines/Product')
+            products.update(prefetch_products(chunk_skus - products.keys()))
+            if auto_confirm:
+                # Stock for the chunk's new products in one read_group
+                new_ids = {products[sku] for sku in chunk_skus if sku in products} - available.keys()
+                stock = get_available_quantities(new_ids)
+                available.update({pid: stock.get(pid, 0) for pid in new_ids})
+
+            # Each distinct date of the chunk's new orders is parsed once
+            dates = {row[4]: None for row in chunk
+                     if row[0] and row[4] and row[0] not in existing_orders}
+            for order_date in dates:
+                dates[order_date] = format_datetime_for_odoo(order_date)
+
+            for (order_ref, customer, invoice_addr, delivery_addr, order_date,
+                 sku, qty, price) in chunk:
+                # Check if this is a new order header (has order reference)
+                if order_ref:
+                    # Queue previous order if exists
+                    if current and current[5]:
+                        pending.append(current)
+
+                    # Start new order
+                    current = (order_ref, customer, invoice_addr, delivery_addr,
+                               dates.get(order_date), [])
+
+                # Add line item to current order (zero quantities are skipped)
+                if current and sku and qty and float(qty):
+                    current[5].append({
+                        'product_sku': sku,
+                        'quantity': qty,
+                        'price_unit': price
+                    })
+
+            # Orders completed in this chunk are created together
+            flush_orders()
+
+        if products.keys() != cached_skus.keys():
+            _write_cached_skus(sku_cache_path, products, cached_skus)
+
+        if total == 0:
             print("  No orders to import (file is empty)")
             return 0, 0, 0
 
-        print(f"  Found {len(df)} line(s) to process")
-
-        # Group by order (when Order Reference is not blank, it's a new order)
-        current_order = None
-        current_customer = None
-        current_invoice_addr = None
-        current_delivery_addr = None
-        current_date = None
-        current_lines = []
-
-        orders_created = 0
-        orders_confirmed = 0
-        orders_quotation = 0
-        orders_skipped = 0
-
-        for idx, row in df.iterrows():
-            order_ref = row.get('Order Reference', '').strip()
-
-            # Check if this is a new order header (has order reference)
-            if order_ref:
-                # Save previous order if exists
-                if current_order and current_lines:
-                    # Check if order already exists by name
-                    existing = models.execute_kw(db, uid, password, 'sale.order', 'search',
-                        [[['name', '=', current_order]]])
-
-                    if existing:
-                        print(f"  ⊘ Skipped: {current_order} (already exists)")
-                        orders_skipped += 1
-                    else:
-                        order_id, order_status = create_sale_order(
-                            current_order, current_customer, current_invoice_addr,
-                            current_delivery_addr, current_date, current_lines,
-                            auto_confirm=auto_confirm
-                        )
-                        if order_id:
-                            print(f"  ✓ Created: {current_order} (ID: {order_id}, {len(current_lines)} line(s))")
-                            orders_created += 1
-                            if order_status == 'confirmed':
-                                orders_confirmed += 1
-                            else:
-                                orders_quotation += 1
-                        else:
-                            print(f"  ✗ Failed: {current_order}")
-
-                # Start new order
-                current_order = order_ref
-                current_customer = row.get('Customer', '').strip()
-                current_invoice_addr = row.get('Invoice Address', '').strip()
-                current_delivery_addr = row.get('Delivery Address', '').strip()
-                current_date = row.get('Order Date', '').strip()
-                current_lines = []
-
-            # Add line item to current order
-            sku = row.get('Order Lines/Product', '').strip()
-            qty = row.get('OrderLines/Quantity', 0)
-            price = row.get('OrderLines/Price_unit', 0)
-
-            if sku and qty:
-                current_lines.append({
-                    'product_sku': sku,
-                    'quantity': qty,
-                    'price_unit': price
-                })
-
         # Don't forget the last order
-        if current_order and current_lines:
-            # Check if order already exists by name
-            existing = models.execute_kw(db, uid, password, 'sale.order', 'search',
-                [[['name', '=', current_order]]])
-
-            if existing:
-                print(f"  ⊘ Skipped: {current_order} (already exists)")
-                orders_skipped += 1
-            else:
-                order_id, order_status = create_sale_order(
-                    current_order, current_customer, current_invoice_addr,
-                    current_delivery_addr, current_date, current_lines,
-                    auto_confirm=auto_confirm
-                )
-                if order_id:
-                    print(f"  ✓ Created: {current_order} (ID: {order_id}, {len(current_lines)} line(s))")
-                    orders_created += 1
-                    if order_status == 'confirmed':
-                        orders_confirmed += 1
-                    else:
-                        orders_quotation += 1
-                else:
-                    print(f"  ✗ Failed: {current_order}")
+        flush_orders(include_current=True)
+
+        orders_created = counts['created']
+        orders_confirmed = counts['confirmed']
+        orders_quotation = counts['quotation']
+        orders_skipped = counts['skipped']
 
         print(f"\n  Summary: {orders_created} created ({orders_confirmed} ORDERS, {orders_quotation} QUOTATIONS), {orders_skipped} skipped")
         return orders_created, orders_confirmed, orders_quotation
@@ -478,6 +834,7 @@ def import_orders(auto_confirm=False):
     except Exception as e:
         print(f"  ERROR reading {ORDERS_FILE}: {e}")
         import traceback
+        sys.stdout.flush()
         traceback.print_exc()
         return 0, 0, 0
 
@@ -496,8 +853,12 @@ Examples:
   python import_to_odoo.py                    # Import without auto-confirmation
   python import_to_odoo.py --confirm          # Auto-confirm orders with all items in stock
   python import_to_odoo.py --confirm-if-available  # Same as --confirm
+  python import_to_odoo.py --refresh-cache    # Ignore cached SKU lookups
         """
     )
+    parser.add_argument('--refresh-cache',
+                        action='store_true',
+                        help='Look up every SKU in Odoo instead of using the cached product IDs')
     parser.add_argument('--confirm', '--confirm-if-available',
                         dest='auto_confirm',
                         action='store_true',
@@ -505,6 +866,11 @@ Examples:
 
     args = parser.parse_args()
 
+    # A console line-buffers stdout, costing one write per progress line;
+    # buffer it instead and flush after each chunk of contacts or orders
+    if sys.stdout.isatty() and hasattr(sys.stdout, 'reconfigure'):
+        sys.stdout.reconfigure(line_buffering=False)
+
     print("\n" + "="*80)
     print("ODOO IMPORT FROM CSV FILES")
     if args.auto_confirm:
@@ -517,7 +883,8 @@ Examples:
     contacts_imported = import_contacts()
 
     # Then import orders
-    orders_imported, orders_confirmed, orders_quotation = import_orders(auto_confirm=args.auto_confirm)
+    orders_imported, orders_confirmed, orders_quotation = import_orders(auto_confirm=args.auto_confirm,
+                                                                      refresh_cache=args.refresh_cache)
 
     # Final summary
     print("\n" + "="*80)
@@ -547,5 +914,6 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"\nERROR: {e}")
         import traceback
+        sys.stdout.flush()
         traceback.print_exc()
         sys.exit(1)
@@ -6,67 +6,225 @@ This script provides a simple menu interface for running the various
 Materials management tasks for stock and orders across Shopify and Odoo.
 
 Simply select an option from the menu to execute the corresponding task.
+A task can also be started directly, without the menu:
+
+    python materials_menu.py 4
 """
 
+import codecs
+import hashlib
+import json
 import os
+import re
+import shlex
 import sys
 import subprocess
 import time
+import types
 from datetime import datetime
 
-# ANSI color codes for terminal output (Windows-compatible empty strings)
-class Colors:
-    HEADER = ''
-    BLUE = ''
-    GREEN = ''
-    YELLOW = ''
-    RED = ''
-    ENDC = ''
-    BOLD = ''
-    UNDERLINE = ''
+_ANSI_CODES = {
+    'HEADER': '\033[95m',
+    'BLUE': '\033[94m',
+    'GREEN': '\033[92m',
+    'YELLOW': '\033[93m',
+    'RED': '\033[91m',
+    'ENDC': '\033[0m',
+    'BOLD': '\033[1m',
+    'UNDERLINE': '\033[4m',
+}
+
+def _ansi_supported():
+    """True if stdout is a terminal that renders ANSI codes (turned on for Windows 10+ consoles)."""
+    if not sys.stdout.isatty() or os.environ.get('TERM') == 'dumb':
+        return False
+    if os.name != 'nt':
+        return True
+    try:
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+        mode = ctypes.c_uint32()
+        if not kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+            return False
+        # ENABLE_VIRTUAL_TERMINAL_PROCESSING; fails on consoles older than Windows 10
+        return bool(kernel32.SetConsoleMode(handle, mode.value | 0x0004))
+    except (AttributeError, OSError):
+        return False
+
+# ANSI color codes for terminal output, decided once at startup: empty
+# strings when piped or on a console without ANSI support
+_USE_ANSI = _ansi_supported()
+Colors = types.SimpleNamespace(**{name: code if _USE_ANSI else ''
+                                  for name, code in _ANSI_CODES.items()})
 
 # Get the directory containing this script
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
+# Menu options as (key, title, description); the text is built once
+MENU_OPTIONS = [
+    ('1', 'Import Shopify Data', 'Process Shopify exports and update the database'),
+    ('2', 'Run Order Flow', 'Synchronize and report on orders between Shopify and Odoo'),
+    ('3', 'Stock Cross Reference', 'Generate inventory reconciliation between Shopify and Odoo'),
+    ('4', 'Generate Pull Sheet', 'Create pull sheet from Transfer (stock.picking).csv file'),
+    ('5', 'Create import files from latest orders', 'Fetch from Shopify API, view sync status, generate CSV files'),
+    ('6', 'Import to Odoo (as Quotations)', 'Import CSV files to Odoo without auto-confirmation'),
+    ('7', 'Import to Odoo (Confirm if in Stock)', 'Import CSV files and auto-confirm orders with all items available'),
+    ('R', 'Import Shopify Data (re-run pre-flight)', 'As [1], but check orders_export.csv again instead of reusing the last result'),
+]
+MENU_TEXT = "".join(
+    f"{Colors.BOLD}[{key}] {Colors.BLUE}{title}{Colors.ENDC}\n    {description}\n\n"
+    for key, title, description in MENU_OPTIONS
+) + f"{Colors.BOLD}[0] {Colors.RED}Exit{Colors.ENDC}\n"
+
+# Menu choices that run a wrapper script, as (script name, description)
+_DISPATCH = {
+    '2': ("RUN_ORDER_FLOW", "Order Flow Process"),
+    '3': ("RUN_STOCK_XREF", "Stock Cross Reference"),
+    '4': ("RUN_PULL", "Generating Pull Sheet"),
+    '5': ("RUN_LIVE_IMPORT", "Create import files from latest orders"),
+    '6': ("RUN_IMPORT_TO_ODOO", "Import to Odoo (as Quotations)"),
+    '7': ("RUN_IMPORT_TO_ODOO_CONFIRM", "Import to Odoo (Confirm if in Stock)"),
+}
+
+_PROMPT = f"{Colors.GREEN}Enter your choice (0-7, R): {Colors.ENDC}"
+_PAUSE_PROMPT = f"\n{Colors.YELLOW}Press Enter to return to the menu...{Colors.ENDC}"
+
+# Pre-flight choice for option [1], reused while its input files are unchanged
+PREFLIGHT_CACHE_FILE = os.path.join(SCRIPT_DIR, '.preflight_cache.json')
+PREFLIGHT_CACHE_MAX_AGE = 10 * 60  # seconds
+PREFLIGHT_INPUTS = ['orders_export.csv', 'odoosys.py']
+
+def _preflight_inputs_fingerprint():
+    """Hash the size and mtime of every file the pre-flight check reads."""
+    stats = []
+    for name in PREFLIGHT_INPUTS:
+        try:
+            st = os.stat(os.path.join(SCRIPT_DIR, name))
+            stats.append((name, st.st_size, st.st_mtime_ns))
+        except OSError:
+            stats.append((name, None, None))
+    return hashlib.blake2b(repr(stats).encode(), digest_size=16).hexdigest()
+
+def _read_preflight_cache(fingerprint):
+    """Return the cached choice if it was made for the same inputs within the max age."""
+    try:
+        with open(PREFLIGHT_CACHE_FILE) as f:
+            cache = json.load(f)
+        if (cache.get('fingerprint') != fingerprint
+                or time.time() - cache.get('timestamp', 0) >= PREFLIGHT_CACHE_MAX_AGE):
+            return None
+        return cache.get('choice')
+    except (OSError, ValueError, AttributeError, TypeError):
+        return None
+
+def _write_preflight_cache(fingerprint, choice):
+    """Write the cache atomically so a concurrent reader never sees half a file."""
+    try:
+        tmp_path = f"{PREFLIGHT_CACHE_FILE}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'fingerprint': fingerprint, 'choice': choice, 'timestamp': time.time()}, f)
+        os.replace(tmp_path, PREFLIGHT_CACHE_FILE)
+    except OSError:
+        pass  # Caching is best effort
+
+# Erase display and home the cursor
+_ANSI_CLEAR = '\033[2J\033[H'
+
 def clear_screen():
-    """Clear the terminal screen."""
-    if os.name == 'nt':
+    """Clear the terminal screen, with an escape code where ANSI is supported."""
+    if _USE_ANSI:
+        sys.stdout.write(_ANSI_CLEAR)
+        sys.stdout.flush()
+    elif os.name == 'nt':
         os.system('cls')
     else:
         os.system('clear')
 
-def print_header():
-    """Print the header for the menu."""
+# Menu header; only the timestamp is filled in per redraw
+_HEADER_TEMPLATE = (
+    f"{Colors.HEADER}{Colors.BOLD}{'=' * 80}{Colors.ENDC}\n"
+    f"{Colors.HEADER}{Colors.BOLD}{'MATERIALS MANAGEMENT SYSTEM':^80}{Colors.ENDC}\n"
+    f"{Colors.HEADER}{Colors.BOLD}{{ts:^80}}{Colors.ENDC}\n"
+    f"{Colors.HEADER}{Colors.BOLD}{'=' * 80}{Colors.ENDC}\n"
+    "\n"
+)
+
+def print_header(body=''):
+    """Clear the screen and print the header followed by body in a single write."""
     clear_screen()
-    print(f"{Colors.HEADER}{Colors.BOLD}{'=' * 80}{Colors.ENDC}")
-    print(f"{Colors.HEADER}{Colors.BOLD}{'MATERIALS MANAGEMENT SYSTEM':^80}{Colors.ENDC}")
-    print(f"{Colors.HEADER}{Colors.BOLD}{datetime.now().strftime('%Y-%m-%d %H:%M:%S'):^80}{Colors.ENDC}")
-    print(f"{Colors.HEADER}{Colors.BOLD}{'=' * 80}{Colors.ENDC}")
-    print()
+    sys.stdout.write(_HEADER_TEMPLATE.format(ts=datetime.now().strftime('%Y-%m-%d %H:%M:%S')) + body)
+    sys.stdout.flush()
+
+def script_file_for(script_name):
+    """Wrapper script file name for this OS (.bat on Windows, .sh on Linux)."""
+    if os.name == 'nt':
+        return script_name + '.bat'
+    return script_name + '.sh'
+
+# A wrapper line that only starts a Python script, e.g. "python import_to_odoo.py --confirm"
+_PYTHON_LINE = re.compile(r'^\s*python3?\s+(\S+\.py)(.*)$', re.IGNORECASE)
+# Wrapper lines that don't change what runs; the menu pauses after every task itself
+_IGNORED_LINE = re.compile(r'^\s*(#.*|@?echo off|rem( .*)?|pause|)\s*$', re.IGNORECASE)
+
+def _direct_command(script_name):
+    """
+    Return [python, script, args...] if the wrapper script does nothing but
+    start one Python script, else None.
+    """
+    try:
+        with open(os.path.join(SCRIPT_DIR, script_file_for(script_name))) as f:
+            lines = [line for line in f if not _IGNORED_LINE.match(line)]
+    except OSError:
+        return None
+    match = _PYTHON_LINE.match(lines[0]) if len(lines) == 1 else None
+    if not match:
+        return None
+    return [sys.executable, match.group(1)] + shlex.split(match.group(2), posix=os.name != 'nt')
+
+# Commands for the wrappers that can be skipped, read once at startup
+_DIRECT_COMMANDS = {script_name: _direct_command(script_name)
+                    for script_name in ['RUN_IMPORT'] + [name for name, _ in _DISPATCH.values()]}
+
+def run_task(args, **kwargs):
+    """
+    Start a task and wait for it, returning its exit code.
+
+    The task shares the console, so Ctrl-C reaches it too. The menu lets
+    the task decide how to stop instead of killing it and exiting itself.
+    """
+    return wait_for_task(subprocess.Popen(args, **kwargs))
+
+def wait_for_task(process):
+    """Wait for a started task, letting it handle Ctrl-C (see run_task())."""
+    while True:
+        try:
+            return process.wait()
+        except KeyboardInterrupt:
+            continue
 
 def run_script(script_name, description):
     """Run a script (.bat on Windows, .sh on Linux) and wait for it to complete."""
     print(f"\n{Colors.BLUE}Running: {description}...{Colors.ENDC}")
     print(f"{Colors.YELLOW}{'=' * 80}{Colors.ENDC}")
 
-    # Determine script extension based on OS
-    if os.name == 'nt':
-        script_file = script_name + '.bat'
-    else:
-        script_file = script_name + '.sh'
-
-    # Full path to the script file
+    script_file = script_file_for(script_name)
     script_path = os.path.join(SCRIPT_DIR, script_file)
 
     exit_code = 0
     try:
-        # Use subprocess.call so the output appears in the terminal
-        if os.name == 'nt':
-            # On Windows, shell=True is required for batch files
-            exit_code = subprocess.call(script_path, shell=True)
+        # The child inherits the terminal, so its output appears as it is
+        # written and its prompts can read from the keyboard
+        command = _DIRECT_COMMANDS.get(script_name)
+        if command:
+            # The wrapper only starts Python, so start it without a shell
+            exit_code = run_task(command, cwd=SCRIPT_DIR)
+        elif os.name == 'nt':
+            # CreateProcess runs .bat files itself; no extra shell needed
+            exit_code = run_task([script_path])
         else:
             # On Linux, make executable and run with bash
-            exit_code = subprocess.call(['bash', script_path])
+            exit_code = run_task(['bash', script_path])
 
         # Show appropriate completion message based on exit code
         if exit_code == 0:
@@ -77,38 +235,74 @@ def run_script(script_name, description):
         print(f"\n{Colors.RED}Error executing {script_file}: {e}{Colors.ENDC}")
 
     # Pause to let user see the results
-    input(f"\n{Colors.YELLOW}Press Enter to return to the menu...{Colors.ENDC}")
-
-def run_shopify_import():
-    """Run Shopify import with pre-flight check and anomaly review options."""
-    import subprocess
-
+    input(_PAUSE_PROMPT)
+
+_CHOICE_MARKER = re.compile(r'CHOICE=(\w+)')
+
+def run_preflight():
+    """
+    Run shopify_import_preflight.py, passing its output through to the
+    console as it arrives, and return (exit code, choice). The choice is
+    read from the CHOICE=... line the check prints last; None if missing.
+    """
+    # Unbuffered so prompts show before the check waits for input, and
+    # UTF-8 because a pipe would otherwise get the Windows ANSI code page
+    env = dict(os.environ, PYTHONUNBUFFERED='1', PYTHONIOENCODING='utf-8')
+    process = subprocess.Popen([sys.executable, 'shopify_import_preflight.py'],
+                               cwd=SCRIPT_DIR, stdout=subprocess.PIPE, env=env)
+    decoder = codecs.getincrementaldecoder('utf-8')('replace')
+    output = []
+    while True:
+        try:
+            data = os.read(process.stdout.fileno(), 4096)
+        except KeyboardInterrupt:
+            continue  # The check got the Ctrl-C too and decides what to do
+        if not data:
+            break
+        text = decoder.decode(data)
+        output.append(text)
+        sys.stdout.write(text)
+        sys.stdout.flush()
+    process.stdout.close()
+    exit_code = wait_for_task(process)
+
+    # The marker may share a line with the last prompt, as the echo of the
+    # user's answer goes to the console rather than the pipe
+    choices = _CHOICE_MARKER.findall(''.join(output))
+    return exit_code, choices[-1] if choices else None
+
+def run_shopify_import(refresh=False):
+    """
+    Run Shopify import with pre-flight check and anomaly review options.
+
+    A choice made in the last PREFLIGHT_CACHE_MAX_AGE seconds for unchanged
+    input files is reused without running the check again, unless refresh
+    is set. Cancelling is never cached.
+    """
     choice = None
     try:
-        # Run preflight check (user will see output and provide input)
-        result = subprocess.run(['python', 'shopify_import_preflight.py'],
-                              cwd=SCRIPT_DIR)
+        fingerprint = _preflight_inputs_fingerprint()
+        choice = None if refresh else _read_preflight_cache(fingerprint)
 
-        if result.returncode != 0:
-            print(f"\n{Colors.RED}Preflight check failed{Colors.ENDC}")
-            input(f"\n{Colors.YELLOW}Press Enter to return to the menu...{Colors.ENDC}")
-            return
+        if choice:
+            print(f"\n{Colors.BLUE}Reusing the recent pre-flight check ({choice}); "
+                  f"choose R in the menu to run it again{Colors.ENDC}")
+        else:
+            # Run preflight check (user will see output and provide input)
+            exit_code, choice = run_preflight()
 
-        # Read the choice from file
-        choice_file = os.path.join(SCRIPT_DIR, '.preflight_choice')
-        if not os.path.exists(choice_file):
-            print(f"\n{Colors.RED}Could not determine user choice{Colors.ENDC}")
-            input(f"\n{Colors.YELLOW}Press Enter to return to the menu...{Colors.ENDC}")
-            return
+            if exit_code != 0:
+                print(f"\n{Colors.RED}Preflight check failed{Colors.ENDC}")
+                input(_PAUSE_PROMPT)
+                return
 
-        with open(choice_file, 'r') as f:
-            choice = f.read().strip()
+            if not choice:
+                print(f"\n{Colors.RED}Could not determine user choice{Colors.ENDC}")
+                input(_PAUSE_PROMPT)
+                return
 
-        # Clean up the choice file
-        try:
-            os.remove(choice_file)
-        except:
-            pass
+            if choice != 'CANCEL':
+                _write_preflight_cache(fingerprint, choice)
 
         if choice == 'CANCEL':
             print(f"\n{Colors.YELLOW}Import cancelled by user.{Colors.ENDC}")
@@ -124,85 +318,68 @@ def run_shopify_import():
             env = os.environ.copy()
             env['SHOPIFY_IMPORT_AUTO_SKIP'] = '1'
 
-            if os.name == 'nt':
-                subprocess.call(['python', 'process_shopify_exports.py'],
-                              cwd=SCRIPT_DIR, env=env)
-            else:
-                subprocess.call(['python', 'process_shopify_exports.py'],
-                              cwd=SCRIPT_DIR, env=env)
+            run_task([sys.executable, 'process_shopify_exports.py'], cwd=SCRIPT_DIR, env=env)
 
             # Pause after auto-skip import
-            input(f"\n{Colors.YELLOW}Press Enter to return to the menu...{Colors.ENDC}")
+            input(_PAUSE_PROMPT)
         else:
             # Default interactive mode (RUN_INTERACTIVE)
             run_script("RUN_IMPORT", "Importing Shopify Data")
 
     except Exception as e:
         print(f"\n{Colors.RED}Error: {e}{Colors.ENDC}")
-        input(f"\n{Colors.YELLOW}Press Enter to return to the menu...{Colors.ENDC}")
+        input(_PAUSE_PROMPT)
+
+def run_direct(choice):
+    """
+    Run the task for a menu choice given on the command line. On Linux the
+    script replaces this process, so no menu interpreter is left waiting.
+    """
+    entry = _DISPATCH.get(choice)
+    if not entry:
+        print(f"{Colors.RED}Unknown task '{choice}'. Choose one of: {', '.join(_DISPATCH)}{Colors.ENDC}")
+        sys.exit(2)
+
+    command = _DIRECT_COMMANDS.get(entry[0])
+    if command and os.name != 'nt':
+        os.chdir(SCRIPT_DIR)
+        os.execv(command[0], command)
+
+    script_path = os.path.join(SCRIPT_DIR, script_file_for(entry[0]))
+    if command:
+        sys.exit(run_task(command, cwd=SCRIPT_DIR))
+    if os.name == 'nt':
+        # exec on Windows starts a new process and exits at once, handing
+        # the console back mid-task, so wait for the script instead
+        sys.exit(run_task([script_path]))
+    os.execvp('bash', ['bash', script_path])
 
 def main_menu():
     """Display the main menu and handle user input."""
     while True:
-        print_header()
-        
-        # Display menu options
-        print(f"{Colors.BOLD}[1] {Colors.BLUE}Import Shopify Data{Colors.ENDC}")
-        print(f"    Process Shopify exports and update the database")
-        print()
-
-        print(f"{Colors.BOLD}[2] {Colors.BLUE}Run Order Flow{Colors.ENDC}")
-        print(f"    Synchronize and report on orders between Shopify and Odoo")
-        print()
-
-        print(f"{Colors.BOLD}[3] {Colors.BLUE}Stock Cross Reference{Colors.ENDC}")
-        print(f"    Generate inventory reconciliation between Shopify and Odoo")
-        print()
-
-        print(f"{Colors.BOLD}[4] {Colors.BLUE}Generate Pull Sheet{Colors.ENDC}")
-        print(f"    Create pull sheet from Transfer (stock.picking).csv file")
-        print()
-
-        print(f"{Colors.BOLD}[5] {Colors.BLUE}Create import files from latest orders{Colors.ENDC}")
-        print(f"    Fetch from Shopify API, view sync status, generate CSV files")
-        print()
-
-        print(f"{Colors.BOLD}[6] {Colors.BLUE}Import to Odoo (as Quotations){Colors.ENDC}")
-        print(f"    Import CSV files to Odoo without auto-confirmation")
-        print()
-
-        print(f"{Colors.BOLD}[7] {Colors.BLUE}Import to Odoo (Confirm if in Stock){Colors.ENDC}")
-        print(f"    Import CSV files and auto-confirm orders with all items available")
-        print()
-
-        print(f"{Colors.BOLD}[0] {Colors.RED}Exit{Colors.ENDC}")
-        print()
+        # Header and menu options in one write
+        print_header(MENU_TEXT + "\n")
 
         # Get user selection
-        choice = input(f"{Colors.GREEN}Enter your choice (0-7): {Colors.ENDC}")
+        choice = input(_PROMPT).strip().upper()
         
-        if choice == '0':
-            print(f"\n{Colors.YELLOW}Exiting Materials Management System. Goodbye!{Colors.ENDC}")
-            break
+        entry = _DISPATCH.get(choice)
+        if entry:
+            run_script(*entry)
         elif choice == '1':
             run_shopify_import()
-        elif choice == '2':
-            run_script("RUN_ORDER_FLOW", "Order Flow Process")
-        elif choice == '3':
-            run_script("RUN_STOCK_XREF", "Stock Cross Reference")
-        elif choice == '4':
-            run_script("RUN_PULL", "Generating Pull Sheet")
-        elif choice == '5':
-            run_script("RUN_LIVE_IMPORT", "Create import files from latest orders")
-        elif choice == '6':
-            run_script("RUN_IMPORT_TO_ODOO", "Import to Odoo (as Quotations)")
-        elif choice == '7':
-            run_script("RUN_IMPORT_TO_ODOO_CONFIRM", "Import to Odoo (Confirm if in Stock)")
+        elif choice == 'R':
+            run_shopify_import(refresh=True)
+        elif choice == '0':
+            print(f"\n{Colors.YELLOW}Exiting Materials Management System. Goodbye!{Colors.ENDC}")
+            break
         else:
             print(f"\n{Colors.RED}Invalid choice. Please try again.{Colors.ENDC}")
             time.sleep(1.5)
 
 if __name__ == "__main__":
+    if len(sys.argv) == 2:
+        run_direct(sys.argv[1])
     try:
         main_menu()
     except KeyboardInterrupt:
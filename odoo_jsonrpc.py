@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Odoo JSON-RPC Client
+
+Drop-in replacement for the xmlrpc.client.ServerProxy objects the scripts
+use to talk to Odoo. Calls go to /jsonrpc over one keep-alive
+requests.Session, so every call after the first reuses the same TLS
+connection and responses are parsed by the C json decoder instead of the
+pure-Python XML-RPC unmarshaller.
+
+Usage:
+    session = create_session()
+    common = JsonRpcProxy(session, url, 'common')
+    uid = common.authenticate(db, username, password, {})
+    models = JsonRpcProxy(session, url, 'object')
+    models.execute_kw(db, uid, password, 'res.partner', 'search', [[]])
+"""
+
+import itertools
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+class OdooRPCError(Exception):
+    """Error reported by Odoo in a JSON-RPC response."""
+
+class JsonRpcProxy:
+    """
+    Drop-in for xmlrpc.client.ServerProxy that calls one Odoo service
+    ('common' or 'object') through /jsonrpc. All proxies share one
+    keep-alive requests.Session, so calls reuse the same TLS connection.
+    """
+    _ids = itertools.count(1)
+
+    def __init__(self, session, url, service):
+        self._session = session
+        self._url = f"{url}/jsonrpc"
+        self._service = service
+
+    def __getattr__(self, method):
+        if method.startswith('_'):
+            raise AttributeError(method)
+        return lambda *args: self._call(method, args)
+
+    def _call(self, method, args):
+        payload = {
+            'jsonrpc': '2.0',
+            'method': 'call',
+            'id': next(self._ids),
+            'params': {'service': self._service, 'method': method, 'args': list(args)},
+        }
+        response = self._session.post(self._url, json=payload)
+        response.raise_for_status()
+        result = response.json()
+        if result.get('error'):
+            error = result['error']
+            raise OdooRPCError((error.get('data') or {}).get('message') or error.get('message'))
+        return result.get('result')
+
+def create_session(pool_maxsize=16):
+    """
+    Keep-alive session for JsonRpcProxy. Certificates are not verified, as
+    with the unverified SSL context the XML-RPC clients used.
+    """
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    session = requests.Session()
+    session.verify = False
+    session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize))
+    session.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize))
+    return session
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Odoo UID Cache
+
+Remembers the uid returned by common.authenticate() for an hour so scripts
+run back to back from the menu skip the login round-trip. The password is
+still sent with every execute_kw call, so a cached uid grants nothing on
+its own; if Odoo rejects it, the entry is dropped and the script logs in
+again once.
+
+Usage:
+    uid, cached = get_uid(common, url, db, username, password)
+    result, uid = call_with_uid(lambda uid: models.execute_kw(db, uid, password, ...),
+                                common, url, db, username, password, uid, cached)
+"""
+
+import hashlib
+import json
+import os
+import time
+import xmlrpc.client
+
+UID_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'odoo_uid')
+UID_CACHE_TTL = 60 * 60  # seconds
+
+def _uid_cache_path(url, db, username):
+    key = hashlib.sha1(f"{url}|{db}|{username}".encode()).hexdigest()
+    return os.path.join(UID_CACHE_DIR, f"{key}.json")
+
+def _read_cached_uid(cache_path):
+    """Return the cached uid if the cache file is younger than the TTL."""
+    try:
+        if time.time() - os.path.getmtime(cache_path) >= UID_CACHE_TTL:
+            return None
+        with open(cache_path) as f:
+            return json.load(f).get('uid')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def _write_cached_uid(cache_path, uid):
+    """Write the cache atomically so a concurrent reader never sees half a file."""
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'uid': uid, 'ts': time.time()}, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass  # Caching is best effort
+
+def invalidate_uid(url, db, username):
+    """Forget the cached uid for this login."""
+    try:
+        os.remove(_uid_cache_path(url, db, username))
+    except OSError:
+        pass
+
+def get_uid(common, url, db, username, password, use_cache=True):
+    """Return (uid, cached), authenticating only when no fresh uid is cached.
+
+    uid is False when authentication fails; failures are never cached.
+    """
+    cache_path = _uid_cache_path(url, db, username)
+    if use_cache:
+        uid = _read_cached_uid(cache_path)
+        if uid:
+            return uid, True
+
+    uid = common.authenticate(db, username, password, {})
+    if uid:
+        _write_cached_uid(cache_path, uid)
+    return uid, False
+
+def is_access_denied(error):
+    """True if an XML-RPC fault is Odoo rejecting the uid/password pair."""
+    return (isinstance(error, xmlrpc.client.Fault)
+            and ('AccessDenied' in error.faultString
+                 or 'Access Denied' in error.faultString))
+
+def call_with_uid(call, common, url, db, username, password, uid, cached):
+    """Run call(uid), logging in again once if a cached uid is rejected.
+
+    Returns (result, uid) so the caller continues with the uid that worked.
+    """
+    try:
+        return call(uid), uid
+    except xmlrpc.client.Fault as e:
+        if not cached or not is_access_denied(e):
+            raise
+        invalidate_uid(url, db, username)
+        uid, _ = get_uid(common, url, db, username, password, use_cache=False)
+        if not uid:
+            raise
+    return call(uid), uid
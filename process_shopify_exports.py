@@ -16,13 +16,18 @@ IMPORTANT: For marketplace orders, the "Shopify" contact must exist in Odoo befo
 """
 
 import pandas as pd
-import xmlrpc.client
-import ssl
 from datetime import datetime, timezone
 import openpyxl
 import os
 import sys
-import csv
+import hashlib
+import json
+import time
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+
+from odoo_jsonrpc import JsonRpcProxy, create_session
 
 class UserAbortException(Exception):
     """Raised when user aborts the script"""
@@ -39,12 +44,26 @@ except ImportError:
     print("  password = 'your_password'")
     sys.exit(1)
 
-common = xmlrpc.client.ServerProxy('{}/xmlrpc/2/common'.format(url), use_datetime=True,context=ssl._create_unverified_context())
+session = create_session()
+common = JsonRpcProxy(session, url, 'common')
 uid = common.authenticate(db, username, password, {})
-models = xmlrpc.client.ServerProxy('{}/xmlrpc/2/object'.format(url), use_datetime=True,context=ssl._create_unverified_context())
+models = JsonRpcProxy(session, url, 'object')
+
+# Columns of orders_export.csv this script uses; Shopify exports many more.
+# Text columns are read as text so numeric-looking SKUs keep their exact form;
+# numbers are left to pandas so amounts and quantities are written as before.
+EXPORT_COLUMNS = ['Name', 'Email', 'Financial Status', 'Paid at', 'Fulfilled at', 'Refunded Amount',
+                  'Lineitem quantity', 'Lineitem name', 'Lineitem price', 'Lineitem sku',
+                  'Billing Name', 'Billing Street', 'Billing City', 'Billing Zip', 'Billing Province',
+                  'Billing Country', 'Billing Phone']
+EXPORT_TEXT_COLUMNS = ['Name', 'Email', 'Financial Status', 'Paid at', 'Fulfilled at',
+                       'Lineitem name', 'Lineitem sku', 'Billing Name']
+
+# Local copy of the product catalog, topped up by write_date on each run
+PRODUCT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'shopify_import')
+PRODUCT_CACHE_TTL = 24 * 60 * 60  # seconds; a full reload also drops deleted products
 
 # SKU correction tracking
-sku_corrections = []
 sku_cache = {}  # Cache corrections by product name
 
 def get_simple_location(location):
@@ -54,51 +73,128 @@ def get_simple_location(location):
     else:
         return location
 
-def search_odoo_products(search_term):
-    """Search for products in Odoo by name - only products that can be sold"""
+def read_odoo_records(model, domain, fields):
+    """search + read on one model, as a DataFrame (empty when nothing matches)"""
+    ids = models.execute_kw(db, uid, password, model, 'search', [domain])
+    if not ids:
+        return pd.DataFrame()
+    return pd.DataFrame(models.execute_kw(db, uid, password, model, 'read', [ids], {'fields': fields}))
+
+def _product_cache_path():
+    key = hashlib.sha1(f"{url}|{db}".encode()).hexdigest()
+    return os.path.join(PRODUCT_CACHE_DIR, f"products_{key}.json")
+
+def _read_product_cache(cache_path):
+    """Return the cached catalog, or None if it is missing or older than the TTL."""
     try:
-        # Search for product templates
-        products = models.execute_kw(db, uid, password, 'product.template', 'search_read',
-            [[['name', 'ilike', search_term], ['sale_ok', '=', True]]],
-            {'fields': ['name', 'default_code'], 'limit': 50})
-
-        products_with_stock = []
-        for p in products:
-            if not p.get('default_code'):
-                continue
+        with open(cache_path) as f:
+            cache = json.load(f)
+        if time.time() - cache['ts'] >= PRODUCT_CACHE_TTL or not cache['write_date']:
+            return None
+        return cache
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+def _write_product_cache(cache_path, cache):
+    """Write the cache atomically so a concurrent reader never sees half a file."""
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass  # Caching is best effort
+
+def load_odoo_skus():
+    """
+    Return the SKUs of all product templates. With a fresh local cache only
+    templates written since its newest write_date are read (archived ones
+    are dropped); otherwise the whole catalog is read and cached.
+    """
+    cache_path = _product_cache_path()
+    cache = _read_product_cache(cache_path)
+    if cache:
+        changed = models.execute_kw(db, uid, password, 'product.template', 'search_read',
+            [[['write_date', '>=', cache['write_date']]]],
+            {'fields': ['default_code', 'write_date', 'active'], 'context': {'active_test': False}})
+        codes = cache['codes']
+        for p in changed:
+            if p['active'] and p.get('default_code'):
+                codes[str(p['id'])] = p['default_code']
+            else:
+                codes.pop(str(p['id']), None)
+    else:
+        changed = models.execute_kw(db, uid, password, 'product.template', 'search_read',
+            [[]], {'fields': ['default_code', 'write_date']})
+        codes = {str(p['id']): p['default_code'] for p in changed if p.get('default_code')}
+        cache = {'ts': time.time(), 'write_date': '', 'codes': codes}
 
-            # Get product.product variant IDs for this template
-            product_ids = models.execute_kw(db, uid, password, 'product.product', 'search',
-                [[['product_tmpl_id', '=', p['id']], ['default_code', '=', p['default_code']]]])
+    if changed:
+        cache['write_date'] = max([cache['write_date']] + [str(p['write_date']) for p in changed])
+        _write_product_cache(cache_path, cache)
 
-            if not product_ids:
-                # No variants found, add without stock info
-                p['stock_info'] = []
-                products_with_stock.append(p)
-                continue
+    return set(codes.values())
 
-            # Query stock.quant for this product
-            quants = models.execute_kw(db, uid, password, 'stock.quant', 'search_read',
-                [[['product_id', 'in', product_ids],
-                  ['quantity', '>', 0],
-                  ['location_id.usage', '=', 'internal']]],
-                {'fields': ['location_id', 'quantity'], 'limit': 5})
-
-            # Format stock info
-            stock_info = []
-            for q in quants:
-                loc_full = q['location_id'][1] if q['location_id'] else 'Unknown'
-                loc_short = get_simple_location(loc_full)
-                qty = int(q['quantity'])
-                stock_info.append({'qty': qty, 'loc': loc_short})
-
-            p['stock_info'] = stock_info
-            products_with_stock.append(p)
-
-        return products_with_stock
+def search_odoo_products(search_term):
+    """Search for products in Odoo by name - only products that can be sold"""
+    try:
+        return _search_odoo_products(search_term)
     except Exception as e:
         print(f"Error searching Odoo: {e}")
-        return []
+        return ()
+
+@functools.lru_cache(maxsize=256)
+def _search_odoo_products(search_term):
+    """
+    Cached by search term, as the catalog doesn't change during a run; a
+    repeated search (retry, second chance) costs no RPCs. Results are
+    read-only so callers can't alter the cached copy. Errors aren't cached.
+    """
+    # Search for product templates
+    products = models.execute_kw(db, uid, password, 'product.template', 'search_read',
+        [[['name', 'ilike', search_term], ['sale_ok', '=', True]]],
+        {'fields': ['name', 'default_code'], 'limit': 50})
+
+    products = [p for p in products if p.get('default_code')]
+    if not products:
+        return ()
+
+    # Variants of every matching template, fetched in one call; a variant
+    # only counts if it carries its own template's SKU
+    template_codes = {p['id']: p['default_code'] for p in products}
+    variants = models.execute_kw(db, uid, password, 'product.product', 'search_read',
+        [[['product_tmpl_id', 'in', list(template_codes)],
+          ['default_code', 'in', list(set(template_codes.values()))]]],
+        {'fields': ['product_tmpl_id', 'default_code']})
+
+    template_of = {}
+    for v in variants:
+        tmpl_id = v['product_tmpl_id'][0]
+        if v['default_code'] == template_codes.get(tmpl_id):
+            template_of[v['id']] = tmpl_id
+
+    # Stock for all of those variants in one call, then at most 5
+    # locations per template as before
+    stock_by_template = {tmpl_id: [] for tmpl_id in template_codes}
+    if template_of:
+        quants = models.execute_kw(db, uid, password, 'stock.quant', 'search_read',
+            [[['product_id', 'in', list(template_of)],
+              ['quantity', '>', 0],
+              ['location_id.usage', '=', 'internal']]],
+            {'fields': ['product_id', 'location_id', 'quantity']})
+
+        for q in quants:
+            stock_info = stock_by_template[template_of[q['product_id'][0]]]
+            if len(stock_info) >= 5:
+                continue
+            loc_full = q['location_id'][1] if q['location_id'] else 'Unknown'
+            loc_short = get_simple_location(loc_full)
+            qty = int(q['quantity'])
+            stock_info.append(MappingProxyType({'qty': qty, 'loc': loc_short}))
+
+    return tuple(MappingProxyType({**p, 'stock_info': tuple(stock_by_template[p['id']])})
+                 for p in products)
 
 def interactive_sku_lookup(lineitem_name, order_name, current_sku='', page_size=10):
     """Interactive SKU lookup - prompt user to find correct SKU in Odoo"""
@@ -212,16 +308,6 @@ def interactive_sku_lookup(lineitem_name, order_name, current_sku='', page_size=
 
                         # Cache this correction for future use
                         sku_cache[lineitem_name] = selected_sku
-
-                        # Record the correction
-                        sku_corrections.append({
-                            'Order': order_name,
-                            'Product Name': lineitem_name,
-                            'Shopify SKU': current_sku if current_sku else '(missing)',
-                            'Corrected to Odoo SKU': selected_sku,
-                            'Action': 'Update SKU in Shopify'
-                        })
-
                         return selected_sku
                     else:
                         print("Invalid selection number")
@@ -230,37 +316,32 @@ def interactive_sku_lookup(lineitem_name, order_name, current_sku='', page_size=
             else:
                 print("Invalid input. Please enter a valid option.")
 
-# Load Odoo contacts
+# Load Odoo contacts, orders and product SKUs; the reads are independent, so
+# they run side by side over the shared session
 print("Loading Odoo data...")
+with ThreadPoolExecutor(max_workers=3) as executor:
+    contacts_future = executor.submit(read_odoo_records, 'res.partner', [['type', '=', 'contact']],
+                                      ['name', 'city', 'street'])
+    orders_future = executor.submit(read_odoo_records, 'sale.order', [],
+                                    ['name', 'partner_id', 'state', 'date_order'])
+    skus_future = executor.submit(load_odoo_skus)
+
 try:
-    polling = models.execute_kw(db, uid, password, 'res.partner', 'search', [[['type', '=', 'contact']]])
-    if len(polling) > 0:
-        contacts = models.execute_kw(db, uid, password, 'res.partner', 'read', [polling], {'fields': ['name', 'city', 'street']})
-        df_contacts = pd.DataFrame(contacts)
-    else:
-        df_contacts = pd.DataFrame()
+    df_contacts = contacts_future.result()
 except Exception as e:
     print(f"Error querying contacts: {e}")
     df_contacts = pd.DataFrame()
 
-# Load Odoo orders
 try:
-    polling = models.execute_kw(db, uid, password, 'sale.order', 'search', [[]])
-    if len(polling) > 0:
-        orders = models.execute_kw(db, uid, password, 'sale.order', 'read', [polling], {'fields': ['name', 'partner_id', 'state','date_order']})
-        df_orders = pd.DataFrame(orders)
-    else:
-        df_orders = pd.DataFrame()
+    df_orders = orders_future.result()
 except Exception as e:
     print(f"Error querying sale orders: {e}")
     df_orders = pd.DataFrame()
 
-# Load all Odoo product SKUs for validation
+# All Odoo product SKUs, for validation
 print("Loading Odoo products...")
 try:
-    all_products = models.execute_kw(db, uid, password, 'product.template', 'search_read',
-        [[]], {'fields': ['default_code'], 'limit': 10000})
-    odoo_skus = set([p.get('default_code') for p in all_products if p.get('default_code')])
+    odoo_skus = skus_future.result()
 except Exception as e:
     print(f"Error querying products: {e}")
     odoo_skus = set()
@@ -274,7 +355,9 @@ if not os.path.exists(csv_file):
     sys.exit(1)
 
 try:
-    df_in = pd.read_csv(csv_file, sep=",")
+    # Columns missing from an older export are simply absent, as before
+    df_in = pd.read_csv(csv_file, sep=",", usecols=lambda column: column in EXPORT_COLUMNS,
+                        dtype={column: str for column in EXPORT_TEXT_COLUMNS})
 except PermissionError:
     print(f"ERROR: {csv_file} is open in another program. Please close it and try again.")
     sys.exit(1)
@@ -302,39 +385,32 @@ try:
     # 2. Not paid (Financial Status != 'paid')
     # 3. Already fulfilled (Fulfilled at has a date - nothing left to fulfill in Odoo)
 
-    excluded_orders = set()
-    excluded_reasons = {}
+    # Each order's header fields are on its first row; check all orders at once
+    first_rows = df_in[df_in['Name'].fillna('') != ''].drop_duplicates('Name').set_index('Name')
 
-    for order_name in all_order_names_before:
-        order_rows = df_in[df_in['Name'] == order_name]
-        if len(order_rows) == 0:
-            continue
+    def header_column(column):
+        if column in first_rows.columns:
+            return first_rows[column]
+        return pd.Series('', index=first_rows.index, dtype=object)
 
-        first_row = order_rows.iloc[0]
+    refunded_amount = header_column('Refunded Amount')
+    financial_status = header_column('Financial Status').fillna('')
+    fulfilled_at = header_column('Fulfilled at')
 
-        # Check refunded
-        refunded_amount = first_row.get('Refunded Amount', 0)
-        try:
-            if pd.notna(refunded_amount) and refunded_amount != '' and float(refunded_amount) > 0:
-                excluded_orders.add(order_name)
-                excluded_reasons[order_name] = f"Refunded (${refunded_amount})"
-                continue
-        except (ValueError, TypeError):
-            pass  # If conversion fails, treat as not refunded
-
-        # Check financial status
-        financial_status = first_row.get('Financial Status', '')
-        if financial_status.lower() != 'paid':
-            excluded_orders.add(order_name)
-            excluded_reasons[order_name] = f"Not paid (status: {financial_status})"
-            continue
+    # Amounts that aren't numbers are treated as not refunded
+    refunded_mask = pd.to_numeric(refunded_amount, errors='coerce').fillna(0) > 0
+    unpaid_mask = financial_status.astype(str).str.lower() != 'paid'
+    fulfilled_mask = fulfilled_at.notna() & (fulfilled_at != '')
 
-        # Check fulfillment - exclude if already fulfilled
-        fulfilled_at = first_row.get('Fulfilled at', '')
-        if pd.notna(fulfilled_at) and fulfilled_at != '':
-            excluded_orders.add(order_name)
+    excluded_orders = set(first_rows.index[refunded_mask | unpaid_mask | fulfilled_mask])
+    excluded_reasons = {}
+    for order_name in excluded_orders:
+        if refunded_mask[order_name]:
+            excluded_reasons[order_name] = f"Refunded (${refunded_amount[order_name]})"
+        elif unpaid_mask[order_name]:
+            excluded_reasons[order_name] = f"Not paid (status: {financial_status[order_name]})"
+        else:
             excluded_reasons[order_name] = "Already fulfilled"
-            continue
 
     # Filter out excluded orders
     if excluded_orders:
@@ -347,10 +423,8 @@ try:
     # Check for orders already imported to Odoo - do this BEFORE SKU validation
     already_imported = set()
     if not df_orders.empty and 'name' in df_orders.columns:
-        unique_order_names = df_in['Name'].fillna('').replace('', pd.NA).dropna().unique()
-        for order_name in unique_order_names:
-            if order_name in df_orders['name'].values:
-                already_imported.add(order_name)
+        unique_order_names = set(df_in['Name'].dropna()) - {''}
+        already_imported = unique_order_names & set(df_orders['name'].dropna())
 
         if already_imported:
             df_in = df_in[~df_in['Name'].isin(already_imported)]
@@ -370,61 +444,44 @@ try:
     df['Billing Name'] = df['Billing Name'].replace('', pd.NA).ffill().fillna('')
     df['Paid at'] = df['Paid at'].replace('', pd.NA).ffill().fillna('')
 
-    # Interactive SKU resolution for missing or invalid SKUs
-    for idx, row in df.iterrows():
-        sku = row['Lineitem sku']
-        lineitem_name = row['Lineitem name']
-        order_name = row['Name']
-
-        # Skip if lineitem name is empty (probably a header continuation row)
-        if not lineitem_name:
-            continue
-
-        # Check if SKU is missing or not in Odoo
-        if not sku or sku not in odoo_skus:
-            # Check cache first
-            if lineitem_name in sku_cache:
-                corrected_sku = sku_cache[lineitem_name]
-                if corrected_sku:
-                    print(f"✓ Auto-applying cached correction: {lineitem_name[:50]}... -> {corrected_sku}")
-                    df.at[idx, 'Lineitem sku'] = corrected_sku
-                    # Still record each occurrence
-                    sku_corrections.append({
-                        'Order': order_name,
-                        'Product Name': lineitem_name,
-                        'Shopify SKU': sku if sku else '(missing)',
-                        'Corrected to Odoo SKU': corrected_sku,
-                        'Action': 'Update SKU in Shopify'
-                    })
-                else:
-                    # User previously skipped this product
-                    sku_corrections.append({
-                        'Order': order_name,
-                        'Product Name': lineitem_name,
-                        'Shopify SKU': sku if sku else '(missing)',
-                        'Corrected to Odoo SKU': '(skipped)',
-                        'Action': 'SKIPPED - Order line will not be imported'
-                    })
-                    df.at[idx, 'Lineitem sku'] = '__SKIP__'
-            else:
-                # Not in cache - prompt user
-                corrected_sku = interactive_sku_lookup(lineitem_name, order_name, sku)
-                if corrected_sku:
-                    df.at[idx, 'Lineitem sku'] = corrected_sku
-                else:
-                    # User skipped - record it but mark for skipping
-                    sku_corrections.append({
-                        'Order': order_name,
-                        'Product Name': lineitem_name,
-                        'Shopify SKU': sku if sku else '(missing)',
-                        'Corrected to Odoo SKU': '(skipped)',
-                        'Action': 'SKIPPED - Order line will not be imported'
-                    })
-                    # Mark this row for removal
-                    df.at[idx, 'Lineitem sku'] = '__SKIP__'
+    # Product names repeat across orders; as a category the lookup masks and
+    # the sku_cache map below work once per distinct name
+    df['Lineitem name'] = df['Lineitem name'].astype('category')
+
+    # Interactive SKU resolution for missing or invalid SKUs. Valid SKUs are
+    # found with one mask; only the remaining line items (with a product
+    # name - blank names are header continuation rows) are walked.
+    valid_mask = df['Lineitem sku'].isin(odoo_skus) & (df['Lineitem sku'] != '')
+    needs_lookup = df.loc[~valid_mask & (df['Lineitem name'] != ''), ['Lineitem sku', 'Lineitem name', 'Name']]
+
+    # Prompt once per distinct product, at its first occurrence
+    occurrences = needs_lookup['Lineitem name'].value_counts()
+    first_occurrences = needs_lookup.drop_duplicates('Lineitem name')
+    for sku, lineitem_name, order_name in first_occurrences.itertuples(index=False, name=None):
+        corrected_sku = interactive_sku_lookup(lineitem_name, order_name, sku)
+        if corrected_sku and occurrences[lineitem_name] > 1:
+            print(f"✓ Auto-applying cached correction: {lineitem_name[:50]}... -> {corrected_sku} "
+                  f"({occurrences[lineitem_name] - 1} more line item(s))")
+
+    # Broadcast the answers to every occurrence. Skipped line items keep their
+    # Shopify SKU for now and are tracked in skip_mask
+    corrected = needs_lookup['Lineitem name'].map(sku_cache).astype(object)
+    resolved = corrected.notna()
+    df.loc[needs_lookup.index[resolved], 'Lineitem sku'] = corrected[resolved]
+    skip_mask = pd.Series(df.index.isin(needs_lookup.index[~resolved]), index=df.index)
+
+    # Record each occurrence so the corrections file lists every affected order
+    sku_corrections = pd.DataFrame({
+        'Order': needs_lookup['Name'],
+        'Product Name': needs_lookup['Lineitem name'],
+        'Shopify SKU': needs_lookup['Lineitem sku'].replace('', '(missing)'),
+        'Corrected to Odoo SKU': corrected.fillna('(skipped)'),
+        'Action': resolved.map({True: 'Update SKU in Shopify',
+                                False: 'SKIPPED - Order line will not be imported'}),
+    })
 
     # Check for skipped rows and offer second chance
-    skipped_rows = df[df['Lineitem sku'] == '__SKIP__']
+    skipped_rows = df[skip_mask]
     auto_skip = os.environ.get('SHOPIFY_IMPORT_AUTO_SKIP', '0') == '1'
 
     if len(skipped_rows) > 0 and not auto_skip:
@@ -443,19 +500,24 @@ try:
                 # Find a sample order for this product
                 sample_row = skipped_rows[skipped_rows['Lineitem name'] == product_name].iloc[0]
                 order_name = sample_row['Name']
-                current_sku = sample_row['Lineitem sku'] if sample_row['Lineitem sku'] != '__SKIP__' else ''
+                current_sku = sample_row['Lineitem sku']
 
                 # Try lookup again
                 corrected_sku = interactive_sku_lookup(product_name, order_name, current_sku)
 
                 if corrected_sku:
+                    # Every line of this product was recorded as skipped; record the fix instead
+                    rows = sku_corrections['Product Name'] == product_name
+                    sku_corrections.loc[rows, ['Corrected to Odoo SKU', 'Action']] = [corrected_sku, 'Update SKU in Shopify']
+
                     # Apply correction to all rows with this product
-                    mask = (df['Lineitem name'] == product_name) & (df['Lineitem sku'] == '__SKIP__')
+                    mask = skip_mask & (df['Lineitem name'] == product_name)
                     df.loc[mask, 'Lineitem sku'] = corrected_sku
+                    skip_mask &= ~mask
                     print(f"✓ Applied {corrected_sku} to all instances of this product")
 
     # Final check for remaining items with unresolved SKUs
-    still_skipped = df[df['Lineitem sku'] == '__SKIP__']
+    still_skipped = df[skip_mask]
     skipped_items_count = len(still_skipped)
 
     if skipped_items_count > 0:
@@ -486,23 +548,23 @@ try:
                     f.write(f"  Product: {item['Lineitem name']}\n")
                     f.write(f"  Quantity: {item['Lineitem quantity']}\n")
                     f.write(f"  Price: ${item['Lineitem price']}\n")
-                    f.write(f"  Current SKU: {item['Lineitem sku']}\n")
+                    f.write(f"  Current SKU: {item['Lineitem sku'] or '(missing)'}\n")
                     f.write(f"  Action: Find correct SKU in Odoo and update in import file\n\n")
 
             f.write("\n" + "="*80 + "\n")
             f.write("TO RESOLVE:\n")
             f.write("="*80 + "\n")
             f.write("1. Open 02_orders_upload.csv in a spreadsheet\n")
-            f.write("2. Find items marked with __SKIP__ in the 'Order Lines/Product' column\n")
+            f.write("2. Find the items listed above - their 'Order Lines/Product' column is blank\n")
             f.write("3. Search Odoo for the correct product SKU\n")
-            f.write("4. Replace __SKIP__ with the correct SKU code\n")
+            f.write("4. Enter the correct SKU code in the blank cell\n")
             f.write("5. Save and upload the corrected CSV to Odoo\n\n")
 
         print(f"✓ Created failed_orders.txt for reference")
 
-        # Replace __SKIP__ markers with empty string so they appear as missing SKUs
+        # Blank the SKUs of unresolved items so they appear as missing SKUs
         # User can then fill these in from the CSV editor
-        df.loc[df['Lineitem sku'] == '__SKIP__', 'Lineitem sku'] = ''
+        df.loc[skip_mask, 'Lineitem sku'] = ''
         print(f"✓ Included unresolved items in import files (marked with blank SKU)")
     else:
         # No unresolved items - still create the summary file if it exists from before
@@ -619,12 +681,9 @@ try:
         print(f"✓ Created 01_contacts_upload.csv ({final_contact_count} contacts)")
 
     # Export SKU corrections if any were made
-    if sku_corrections:
+    if not sku_corrections.empty:
         corrections_file = 'sku_corrections.csv'
-        with open(corrections_file, 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=['Order', 'Product Name', 'Shopify SKU', 'Corrected to Odoo SKU', 'Action'])
-            writer.writeheader()
-            writer.writerows(sku_corrections)
+        sku_corrections.to_csv(corrections_file, index=False, header=True)
         print(f"\n✓ Created {corrections_file} ({len(sku_corrections)} corrections)")
         print("  Review sku_corrections.csv to update SKUs in Shopify")
 
@@ -199,13 +199,12 @@ def display_preflight_menu():
 if __name__ == "__main__":
     choice = display_preflight_menu()
 
-    # Write choice to file so parent process can read it
-    with open('.preflight_choice', 'w') as f:
-        if choice == 'run_interactive':
-            f.write("RUN_INTERACTIVE")
-        elif choice == 'run_skip_all':
-            f.write("RUN_SKIP_ALL")
-        else:  # cancel
-            f.write("CANCEL")
+    # Last line of output, read by materials_menu.py
+    if choice == 'run_interactive':
+        print("CHOICE=RUN_INTERACTIVE")
+    elif choice == 'run_skip_all':
+        print("CHOICE=RUN_SKIP_ALL")
+    else:  # cancel
+        print("CHOICE=CANCEL")
 
     sys.exit(0)